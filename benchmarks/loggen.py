@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Generates synthetic OBS Studio logs for benchmarking.
+
+The logs contain everything the checks look at: system header, modules,
+a video settings reset block, scenes with sources, any number of
+streaming/recording sessions with encoder settings, audio buffering and
+lag/drop statistics. Output is deterministic for a given seed.
+
+    python -m benchmarks.loggen --lines 100000 --scenes 50 -o big.log
+"""
+
+import argparse
+import random
+import sys
+
+
+SOURCE_KINDS = ['game_capture', 'monitor_capture', 'window_capture', 'dshow_input',
+                'browser_source', 'image_source', 'text_gdiplus', 'ffmpeg_source',
+                'wasapi_input_capture', 'wasapi_output_capture']
+
+MODULES = ['chrome_elf.dll', 'coreaudio-encoder.dll', 'decklink-ouput-ui.dll',
+           'enc-amf.dll', 'frontend-tools.dll', 'image-source.dll', 'obs-browser.dll',
+           'obs-ffmpeg.dll', 'obs-filters.dll', 'obs-outputs.dll', 'obs-qsv11.dll',
+           'obs-text.dll', 'obs-transitions.dll', 'obs-x264.dll', 'rtmp-services.dll',
+           'text-freetype2.dll', 'win-capture.dll', 'win-dshow.dll', 'win-wasapi.dll']
+
+NOISE = ["[game-capture: '{source}'] attempting to hook process: game.exe",
+         "[game-capture: '{source}'] hooked to process: game.exe",
+         "[browser_source: '{source}'] console.log: heartbeat",
+         "[Media Source '{source}']: settings:",
+         "[WASAPI: '{source}'] update settings:",
+         "User switched to scene '{scene}'",
+         "adding {added} milliseconds of audio buffering, total audio buffering is now {total} milliseconds (source: {source})",
+         "[rtmp stream: 'simple_stream'] Connection to rtmp://live.twitch.tv/app/ successful"]
+
+
+class Clock:
+    """Monotonic HH:MM:SS.mmm timestamps."""
+
+    def __init__(self, rnd, start=8 * 3600 * 1000):
+        self.rnd = rnd
+        self.ms = start
+
+    def __call__(self, step=50):
+        self.ms += self.rnd.randint(0, step)
+        ms = self.ms % (24 * 3600 * 1000)
+        return '{:02d}:{:02d}:{:02d}.{:03d}'.format(ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+
+def header(now):
+    return [now() + ': ' + line for line in [
+        'CPU Name: Intel(R) Core(TM) i7-8700K CPU @ 3.70GHz',
+        'CPU Speed: 3696MHz',
+        'Physical Cores: 6, Logical Cores: 12',
+        'Physical Memory: 16335MB Total, 9402MB Free',
+        'Windows Version: 10.0 Build 19041 (release: 2004; revision: 450; 64-bit)',
+        'Running as administrator: false',
+        'Windows 10 Gaming Features:',
+        '\tGame Bar: On',
+        '\tGame DVR: Off',
+        '\tGame DVR Background Recording: Off',
+        '\tGame Mode: On',
+        'Sec. Software Status:',
+        'Current Date/Time: 2020-10-09, 08:00:00',
+        'Browser Hardware Acceleration: true',
+        'Portable mode: false',
+        'OBS 26.1.0 (64-bit, windows)',
+        '---------------------------------',
+        'audio settings reset:',
+        '\tsamples per sec: 48000',
+        '\tspeakers:        2',
+        '---------------------------------',
+        'Initializing D3D11...',
+        'Available Video Adapters: ',
+        '\tAdapter 0: NVIDIA GeForce GTX 1060 6GB',
+        '\t  Dedicated VRAM: 2147483647',
+        '\t  output 0: pos={0, 0}, size={1920, 1080}, attached=true, refresh=60, name=DELL',
+        'Loading up D3D11 on adapter NVIDIA GeForce GTX 1060 6GB (0)',
+        'D3D11 loaded successfully, feature level used: b000',
+        'Hardware GPU Scheduler: Off',
+        '---------------------------------',
+        'video settings reset:',
+        '\tbase resolution:   1920x1080',
+        '\toutput resolution: 1280x720',
+        '\tdownscale filter:  Bicubic',
+        '\tfps:               60/1',
+        '\tformat:            NV12',
+        '\tYUV mode:          709/Partial',
+        '---------------------------------',
+        'Interface: Intel(R) Ethernet Connection (ethernet, 1000 mbps)']]
+
+
+def modules(now):
+    res = [now() + ': ---------------------------------']
+    for name in MODULES:
+        res.append('{}: Loading module: {}'.format(now(), name))
+    return res
+
+
+def sceneNames(scenes):
+    return ['Scene {}'.format(i + 1) for i in range(scenes)]
+
+
+def loadedScenes(now, rnd, scenes, sources):
+    res = [now() + ': ------------------------------------------------',
+           now() + ': Loaded scenes:']
+    for scene in sceneNames(scenes):
+        res.append("{}: - scene '{}':".format(now(), scene))
+        for i in range(sources):
+            kind = rnd.choice(SOURCE_KINDS)
+            res.append("{}:     - source: '{} {}' ({})".format(now(), scene, i + 1, kind))
+    res.append(now() + ': ------------------------------------------------')
+    return res
+
+
+def x264Settings(now):
+    return [now() + ': ' + line for line in [
+        '---------------------------------',
+        "[x264 encoder: 'simple_h264_stream'] preset: veryfast",
+        "[x264 encoder: 'simple_h264_stream'] settings:",
+        '\trate_control: CBR',
+        '\tbitrate:      6000',
+        '\tbuffer size:  6000',
+        '\tcrf:          0',
+        '\tfps_num:      60',
+        '\tfps_den:      1',
+        '\twidth:        1280',
+        '\theight:       720',
+        '\tkeyint:       250']]
+
+
+def nvencSettings(now):
+    return [now() + ': ' + line for line in [
+        '---------------------------------',
+        "[NVENC encoder: 'streaming_h264'] settings:",
+        '\trate_control: CBR',
+        '\tbitrate:      6000',
+        '\tcqp:          20',
+        '\tkeyint:       60',
+        '\tpreset:       hq',
+        '\tprofile:      high',
+        '\tlevel:        auto',
+        '\twidth:        1280',
+        '\theight:       720',
+        '\t2-pass:       true',
+        '\tb-frames:     2',
+        '\tGPU:          0']]
+
+
+def noise(now, rnd, count, scenes, sources):
+    # a log without scenes still has sources named like those of a scene
+    names = sceneNames(scenes) or sceneNames(1)
+    res = []
+    for _ in range(count):
+        scene = rnd.choice(names)
+        added = rnd.randint(1, 40)
+        line = rnd.choice(NOISE).format(scene=scene,
+                                        source='{} {}'.format(scene, rnd.randint(1, sources)),
+                                        added=added, total=added + rnd.randint(0, 400))
+        res.append('{}: {}'.format(now(), line))
+    return res
+
+
+def percent(part, total, sep='.'):
+    # output statistics use the decimal separator of the user's locale
+    return '{:.1f}%'.format(100.0 * part / total).replace('.', sep)
+
+
+def session(now, rnd, body, scenes, sources, index):
+    """One output session with `body` lines between its start and stop."""
+    frames = rnd.randint(1000, 100000)
+    if index % 2 == 0:
+        kind, output = 'Streaming', 'simple_stream'
+        res = x264Settings(now) if index % 4 == 0 else nvencSettings(now)
+    else:
+        kind, output = 'Recording', 'simple_file_output'
+        res = ["{}: [ffmpeg muxer: 'simple_file_output'] Writing file 'C:/Users/x/Videos/{}.mkv'...".format(now(), index)]
+    res.append('{}: ==== {} Start ==============================================='.format(now(), kind))
+    res.extend(noise(now, rnd, body, scenes, sources))
+    lagged = rnd.randint(0, frames // 50)
+    dropped = rnd.randint(0, frames // 50)
+    skipped = rnd.randint(0, frames // 50)
+    res.append("{}: Output '{}': stopping".format(now(), output))
+    res.append("{}: Output '{}': Total frames output: {} ({} attempted)".format(now(), output, frames - skipped, frames))
+    res.append("{}: Output '{}': Total drawn frames: {} ({} attempted)".format(now(), output, frames - lagged, frames))
+    if kind == 'Streaming':
+        res.append("{}: Output '{}': Number of dropped frames due to insufficient bandwidth/connection stalls: {} ({})".format(now(), output, dropped, percent(dropped, frames, ',')))
+    res.append("{}: Output '{}': Number of lagged frames due to rendering lag/stalls: {} ({})".format(now(), output, lagged, percent(lagged, frames, ',')))
+    res.append("{}: Video stopped, number of skipped frames due to encoding lag: {}/{} ({})".format(now(), skipped, frames, percent(skipped, frames)))
+    res.append('{}: ==== {} Stop ================================================'.format(now(), kind))
+    return res
+
+
+def generateLog(lines=10000, scenes=5, sources=4, sessions=2, seed=0):
+    """Returns a log of at least `lines` lines as a list of strings without
+    line endings. Filler is spread evenly over the sessions."""
+    rnd = random.Random(seed)
+    now = Clock(rnd)
+    log = header(now) + modules(now) + loadedScenes(now, rnd, scenes, max(1, sources))
+    sessions = max(1, sessions)
+    # overhead of one session besides its body is at most 22 lines
+    body = max(0, lines - len(log) - 1 - 22 * sessions) // sessions
+    for i in range(sessions):
+        log.extend(session(now, rnd, body, scenes, max(1, sources), i))
+    if len(log) < lines - 1:
+        log.extend(noise(now, rnd, lines - 1 - len(log), scenes, max(1, sources)))
+    log.append(now() + ': ==== Shutting down ==================================================')
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10000, help="approximate log size in lines")
+    parser.add_argument("--scenes", type=int, default=5, help="number of scenes, 0 for a log without any")
+    parser.add_argument("--sources", type=int, default=4, help="sources per scene")
+    parser.add_argument("--sessions", type=int, default=2, help="recording/streaming sessions")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", "-o", default=None, help="file to write (default: stdout)")
+    flags = parser.parse_args()
+
+    log = generateLog(flags.lines, flags.scenes, flags.sources, flags.sessions, flags.seed)
+    text = '\n'.join(log) + '\n'
+    if flags.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(flags.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
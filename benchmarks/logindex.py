@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compares the old per-check linear scans with the shared LogIndex.
+
+Run from the repository root:
+
+    python -m benchmarks.logindex --lines 10000 100000 500000
+"""
+
+import argparse
+import time
+
+from checks.utils.logindex import LogIndex
+import loganalyzer
+
+
+HEADER = """21:17:44.672: CPU Name: Intel(R) Core(TM) i7-8700K CPU @ 3.70GHz
+21:17:44.672: Windows Version: 10.0 Build 19041 (release: 2004; revision: 450; 64-bit)
+21:17:44.672: Running as administrator: false
+21:17:44.795: OBS 26.1.0 (64-bit, windows)
+21:17:44.799: 	Adapter 0: NVIDIA GeForce GTX 1060 6GB
+21:17:44.802: Loading up D3D11 on adapter NVIDIA GeForce GTX 1060 6GB (0)
+21:17:45.520: ---------------------------------
+21:17:45.520: video settings reset:
+21:17:45.520: 	base resolution:   1920x1080
+21:17:45.520: 	output resolution: 1280x720
+21:17:45.520: 	downscale filter:  Bicubic
+21:17:45.520: 	fps:               60/1
+21:17:45.520: 	format:            NV12
+21:17:45.520: 	YUV mode:          709/Partial
+21:17:46.118: ------------------------------------------------
+21:17:46.118: Loaded scenes:
+21:17:46.118: - scene 'Scene':
+21:17:46.118:     - source: 'Game Capture' (game_capture)
+21:17:46.118: ------------------------------------------------"""
+
+SESSION = """21:18:00.101: ==== Streaming Start ===============================================
+21:18:50.101: Output 'simple_stream': Number of dropped frames due to insufficient bandwidth/connection stalls: 120 (3,3%)
+21:18:50.101: Output 'simple_stream': Number of lagged frames due to rendering lag/stalls: 70 (1,9%)
+21:18:50.101: Video stopped, number of skipped frames due to encoding lag: 44/3620 (1.2%)
+21:18:50.101: ==== Streaming Stop ================================================"""
+
+FILLER = "21:18:10.000: [game-capture: 'Game Capture'] attempting to hook process: game.exe"
+
+
+def makeLog(size):
+    lines = HEADER.split('\n')
+    session = SESSION.split('\n')
+    while len(lines) < size:
+        lines.extend([FILLER] * 200)
+        lines.extend(session)
+    return lines
+
+
+def timeit(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs='+', default=[10000, 100000, 500000],
+                        help="log sizes (in lines) to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, best is reported")
+    flags = parser.parse_args()
+
+    print("{:>10} {:>12} {:>12} {:>8}".format("lines", "list (s)", "index (s)", "speedup"))
+    for size in flags.lines:
+        lines = makeLog(size)
+        before = timeit(lambda: loganalyzer.analyzeLog(lines), flags.repeat)
+        after = timeit(lambda: loganalyzer.analyzeLog(LogIndex(lines)), flags.repeat)
+        print("{:>10} {:>12.4f} {:>12.4f} {:>7.1f}x".format(len(lines), before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
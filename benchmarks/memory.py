@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compares the peak memory of one analysis with a list of lines and a LogBuffer.
+
+The log is given as downloaded text, like a request in the web server
+receives it; the text itself is not counted.
+
+Run from the repository root:
+
+    python -m benchmarks.memory --lines 10000 100000 500000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.loggen import generateLog
+from checks.utils.logindex import LogBuffer, LogIndex
+import loganalyzer
+
+
+def fromList(text):
+    return LogIndex(text.split('\n'))
+
+
+def fromBuffer(text):
+    return LogBuffer(text)
+
+
+def measure(build, text):
+    """Returns (seconds, peak bytes) of building the index and analyzing it."""
+    start = time.perf_counter()
+    loganalyzer.analyzeLog(build(text))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        logLines = build(text)
+        held = tracemalloc.get_traced_memory()[0] - base
+        loganalyzer.analyzeLog(logLines)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return elapsed, held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs='+', default=[10000, 100000, 500000],
+                        help="log sizes (in lines) to benchmark")
+    flags = parser.parse_args()
+
+    mb = 1024 * 1024
+    print("{:>10} {:>9} | {:>9} {:>9} {:>8} | {:>9} {:>9} {:>8} | {:>6}".format(
+        "lines", "text MB", "list MB", "peak MB", "time s", "buffer MB", "peak MB", "time s", "saved"))
+    for size in flags.lines:
+        text = '\n'.join(generateLog(size))
+        before = measure(fromList, text)
+        after = measure(fromBuffer, text)
+        print("{:>10} {:>9.1f} | {:>9.1f} {:>9.1f} {:>8.3f} | {:>9.1f} {:>9.1f} {:>8.3f} | {:>5.0f}%".format(
+            size, len(text) / mb, before[1] / mb, before[2] / mb, before[0],
+            after[1] / mb, after[2] / mb, after[0], 100 - 100 * after[2] / before[2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Times every check of analyzeLog over a sweep of synthetic log sizes.
+
+Reports per-check and total time, peak memory, and the scaling exponent of
+every check (slope of log(time) over log(lines)). Checks that grow faster
+than linearly are flagged. Results can be saved as a baseline and later
+runs compared against it:
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.loggen import generateLog
+from checks.utils.logindex import LogIndex
+from checks.utils.profiler import Profiler
+import loganalyzer
+
+# Python 3.9 and later
+RESET_PEAK = getattr(tracemalloc, 'reset_peak', None)
+
+
+class Allocations:
+    """Profiler for analyzeLog, records the peak of traced memory per check.
+
+    tracemalloc has to be running. peak() is the largest traced memory of
+    the whole run. Before Python 3.9 the peak can only be reset by clearing
+    the traces, memory allocated before a check is then no longer counted
+    and the run's peak is the largest one of a single check."""
+
+    def __init__(self):
+        self.peaks = {}
+        self.logs = 0
+        self.runPeak = 0
+
+    def peak(self):
+        return max(self.runPeak, tracemalloc.get_traced_memory()[1])
+
+    def _resetPeak(self):
+        # returns the traced memory the new peak starts from
+        current, peak = tracemalloc.get_traced_memory()
+        self.runPeak = max(self.runPeak, peak)
+        if RESET_PEAK is None:
+            tracemalloc.clear_traces()
+            return 0
+        RESET_PEAK()
+        return current
+
+    @contextlib.contextmanager
+    def measure(self, name, lines=0, kind='check'):
+        if kind != 'check':
+            # helpers run inside a check, resetting the peak would lose it
+            yield
+            return
+        base = self._resetPeak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def addLines(self, lines):
+        pass
+
+
+def benchSize(size, scenes, sessions, repeat):
+    log = generateLog(size, scenes=scenes, sessions=sessions)
+    best = None
+    for _ in range(repeat):
+        profiler = Profiler()
+        start = time.perf_counter()
+        with profiler.measure('LogIndex'):
+            logLines = LogIndex(log)
+        loganalyzer.analyzeLog(logLines, profiler=profiler)
+        times = {name: stat[2] for name, stat in profiler.stats.items() if stat[0] == 'check'}
+        times['total'] = time.perf_counter() - start
+        if best is None:
+            best = times
+        else:
+            best = {name: min(t, best.get(name, t)) for name, t in times.items()}
+
+    # separate pass, tracing slows everything down considerably
+    allocations = Allocations()
+    tracemalloc.start()
+    try:
+        with allocations.measure('LogIndex'):
+            logLines = LogIndex(log)
+        loganalyzer.analyzeLog(logLines, profiler=allocations)
+        peak = allocations.peak()
+    finally:
+        tracemalloc.stop()
+    return {"lines": len(log), "scenes": scenes, "sessions": sessions,
+            "total": best.pop('total'), "memory": peak,
+            "checks": {name: {"time": t, "memory": allocations.peaks.get(name, 0)} for name, t in best.items()}}
+
+
+def slope(points):
+    """Least squares slope of log(y) over log(x)."""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    if var == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / var
+
+
+def scaling(results, minTime):
+    # checks that never take minTime are all noise and are not fitted
+    res = {}
+    for name in results[-1]["checks"]:
+        points = [(r["lines"], r["checks"][name]["time"]) for r in results if name in r["checks"]]
+        if max(t for _, t in points) >= minTime:
+            res[name] = slope(points)
+    res['total'] = slope([(r["lines"], r["total"]) for r in results])
+    return res
+
+
+def fmtTime(t):
+    return '{:9.2f}ms'.format(t * 1000)
+
+
+def fmtBytes(b):
+    return '{:9.1f}MB'.format(b / (1024 * 1024))
+
+
+def report(results, slopes, threshold, out):
+    names = sorted(results[-1]["checks"], key=lambda n: -results[-1]["checks"][n]["time"])
+    out.write('{:<28}'.format('lines') + ''.join('{:>11}'.format(r["lines"]) for r in results) + '  slope\n')
+    rows = [('total', [r["total"] for r in results], fmtTime),
+            ('peak memory', [r["memory"] for r in results], fmtBytes)]
+    for name, values, fmt in rows:
+        s = slopes.get(name)
+        out.write('{:<28}'.format(name) + ''.join(fmt(v) for v in values) + ('  {:5.2f}'.format(s) if s is not None else '') + '\n')
+    out.write('\n')
+    for name in names:
+        values = [r["checks"].get(name, {}).get("time", 0) for r in results]
+        s = slopes.get(name)
+        flag = '  SUPER-LINEAR' if s is not None and s > threshold else ''
+        out.write('{:<28}'.format(name) + ''.join(fmtTime(v) for v in values) + ('  {:5.2f}'.format(s) if s is not None else '      -') + flag + '\n')
+    out.write('\npeak memory per check, largest log\n')
+    for name in sorted(names, key=lambda n: -results[-1]["checks"][n]["memory"])[:10]:
+        out.write('{:<28}{}\n'.format(name, fmtBytes(results[-1]["checks"][name]["memory"])))
+
+
+def compare(results, baseline, tolerance, minTime, out):
+    """Prints checks that got slower than tolerance times the baseline,
+    returns the number of regressions."""
+    old = {r["lines"]: r for r in baseline["results"]}
+    regressions = 0
+    for r in results:
+        b = old.get(r["lines"])
+        if b is None:
+            out.write('{} lines: not in baseline\n'.format(r["lines"]))
+            continue
+        pairs = [('total', r["total"], b["total"])]
+        pairs += [(name, c["time"], b["checks"][name]["time"]) for name, c in r["checks"].items() if name in b["checks"]]
+        for name, new, before in pairs:
+            if new >= minTime and new > before * tolerance:
+                regressions += 1
+                out.write('{} lines: {} {} -> {} ({:.2f}x)\n'.format(r["lines"], name, fmtTime(before).strip(), fmtTime(new).strip(), new / before))
+    if regressions == 0:
+        out.write('No regressions against the baseline.\n')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help="log sizes (in lines) to sweep")
+    parser.add_argument("--scene-every", type=int, default=200, dest='scene_every',
+                        help="one scene per this many lines, so scene parsing scales with the log")
+    parser.add_argument("--session-every", type=int, default=5000, dest='session_every',
+                        help="one output session per this many lines")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, best is reported")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="scaling exponent above which a check is flagged as super-linear")
+    parser.add_argument("--min-time", type=float, default=0.001, dest='min_time',
+                        help="seconds below which timings are considered noise")
+    parser.add_argument("--save", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown factor against the baseline that counts as a regression")
+    flags = parser.parse_args()
+
+    results = []
+    for size in sorted(flags.lines):
+        scenes = max(1, size // flags.scene_every)
+        sessions = max(1, size // flags.session_every)
+        print('benchmarking {} lines, {} scenes, {} sessions'.format(size, scenes, sessions), file=sys.stderr)
+        results.append(benchSize(size, scenes, sessions, flags.repeat))
+    slopes = scaling(results, flags.min_time)
+    report(results, slopes, flags.threshold, sys.stdout)
+
+    if flags.save is not None:
+        with open(flags.save, "w") as f:
+            json.dump({"python": platform.python_version(), "time": time.time(),
+                       "results": results, "slopes": slopes}, f, indent=1)
+    if flags.compare is not None:
+        with open(flags.compare, "r") as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, flags.tolerance, flags.min_time, sys.stdout):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Times the scene/source checks over a growing number of scenes.
+
+Run from the repository root:
+
+    python -m benchmarks.scenes --scenes 100 1000 10000 --sources 6
+"""
+
+import argparse
+import time
+
+from benchmarks.loggen import generateLog
+from benchmarks.run import slope
+from checks.facts import LogFacts
+from checks.sources import parseScenes
+from checks.utils.logindex import LogIndex
+
+
+def timeParseScenes(log, repeat):
+    # a fresh index per run, nothing is served from the memoized lookups
+    best = None
+    for _ in range(repeat):
+        facts = LogFacts(LogIndex(log))
+        start = time.perf_counter()
+        parseScenes(facts)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                        help="scene counts to sweep")
+    parser.add_argument("--sources", type=int, default=6, help="sources per scene")
+    parser.add_argument("--lines", type=int, default=100000,
+                        help="log size in lines on top of the scenes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scene count, best is reported")
+    flags = parser.parse_args()
+
+    points = []
+    print("{:>8} {:>10} {:>12} {:>14}".format("scenes", "lines", "parseScenes", "us per scene"))
+    for scenes in flags.scenes:
+        log = generateLog(flags.lines + scenes * (flags.sources + 1), scenes=scenes, sources=flags.sources)
+        elapsed = timeParseScenes(log, flags.repeat)
+        points.append((scenes, elapsed))
+        print("{:>8} {:>10} {:>10.2f}ms {:>14.2f}".format(scenes, len(log), elapsed * 1000, elapsed * 1e6 / scenes))
+    s = slope(points)
+    if s is not None:
+        print("scaling exponent in scene count: {:.2f}".format(s))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Wall time of the command line analyzer on a single local log, startup included.
+
+Every run is a fresh interpreter, like a bot that runs loganalyzer.py once
+per log. Reports the time to import loganalyzer alone and the time of a
+whole `loganalyzer.py --file` run, the best and the median of the runs.
+The modules that take longest to import are listed with --imports.
+
+Run from the repository root:
+
+    python -m benchmarks.startup --runs 20 --lines 2000
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.loggen import generateLog
+
+IMPORT = "import time; start = time.perf_counter(); import loganalyzer; print(time.perf_counter() - start)"
+
+
+def timeImport():
+    out = subprocess.run([sys.executable, '-c', IMPORT], check=True, capture_output=True, text=True).stdout
+    return float(out)
+
+
+def timeRun(filename):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'loganalyzer.py', '--file', filename], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def slowestImports(count):
+    """The modules with the largest cumulative import time, from -X importtime."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import loganalyzer'],
+                         check=True, capture_output=True, text=True).stderr
+    times = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.split('|')
+        if name.strip() == 'site':
+            # imported by the interpreter itself, before loganalyzer
+            times = []
+            continue
+        times.append((int(cumulative), name.rstrip()))
+    return sorted(times, reverse=True)[:count]
+
+
+def report(name, seconds):
+    print("{:>8} {:>10.1f} {:>10.1f}".format(name, min(seconds) * 1000, statistics.median(seconds) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10, help="interpreters started per measurement")
+    parser.add_argument("--lines", type=int, default=2000, help="lines of the analyzed log")
+    parser.add_argument("--imports", type=int, default=0, help="list this many of the slowest imports")
+    flags = parser.parse_args()
+
+    fd, filename = tempfile.mkstemp(suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(generateLog(flags.lines)))
+        # the first run warms the file system cache and the bytecode caches
+        timeRun(filename)
+        print("{:>8} {:>10} {:>10}".format("", "best ms", "median ms"))
+        report("import", [timeImport() for _ in range(flags.runs)])
+        report("run", [timeRun(filename) for _ in range(flags.runs)])
+    finally:
+        os.unlink(filename)
+
+    if flags.imports:
+        print()
+        for cumulative, name in slowestImports(flags.imports):
+            print("{:>8.1f} ms {}".format(cumulative / 1000, name))
+
+
+if __name__ == "__main__":
+    main()
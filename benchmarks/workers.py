@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Throughput of the web server's worker processes over the number of workers.
+
+Every worker count analyzes the same batch of synthetic logs through a
+WorkerPool, the way simplehttp.py --workers does. On a machine with at
+least as many cores as workers the speedup should be close to the worker
+count. --pickle sends the logs to the workers pickled instead of in shared
+memory, for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.workers --workers 1 2 4 8 16 --logs 64 --lines 100000
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.loggen import generateLog
+from checks.utils.logindex import LogBuffer
+from server.workers import WorkerPool, analyzeProfiled
+
+
+def throughput(workers, logs, pickled=False):
+    pool = WorkerPool(workers)
+    try:
+        # wait for the workers to be up and warm, that is not measured
+        pool.submit(analyzeProfiled, LogBuffer('\n'.join(generateLog(100))), False).result()
+        start = time.perf_counter()
+        if pickled:
+            futures = [pool.submit(analyzeProfiled, log, False) for log in logs]
+            for f in futures:
+                f.result()
+        else:
+            # the server hands every log over from a thread of its own
+            with ThreadPoolExecutor(workers) as threads:
+                list(threads.map(lambda log: pool.analyze(log, False), logs))
+        return len(logs) / (time.perf_counter() - start)
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="worker counts to measure")
+    parser.add_argument("--logs", type=int, default=32, help="logs analyzed per worker count")
+    parser.add_argument("--lines", type=int, default=100000, help="lines per log")
+    parser.add_argument("--pickle", action='store_true', help="pickle the logs instead of sharing them")
+    flags = parser.parse_args()
+
+    print("{} cores".format(os.cpu_count()))
+    # a few distinct logs, so no worker is served from a cache
+    texts = ['\n'.join(generateLog(flags.lines, seed=seed)) for seed in range(4)]
+    logs = [LogBuffer(texts[i % len(texts)]) for i in range(flags.logs)]
+
+    base = None
+    print("{:>8} {:>10} {:>8}".format("workers", "logs/s", "speedup"))
+    for workers in flags.workers:
+        rate = throughput(workers, logs, flags.pickle)
+        base = base or rate
+        print("{:>8} {:>10.2f} {:>7.2f}x".format(workers, rate, rate / base))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,13 @@ audiobuf_re = re.compile(r"""
     """, re.VERBOSE)
 
 
-def checkAudioBuffering(lines):
+# growth of audio buffering that is pointed out, within the window in seconds
+BUFFERING_RISE = 300
+BUFFERING_WINDOW = 10
+
+
+def checkAudioBuffering(facts):
+    lines = facts.lines
     maxBuffering = searchWithIndex('Max audio buffering reached!', lines)
     if (len(maxBuffering) > 0):
         # This doesn't correspond to a specific amount of time -- it's
@@ -37,16 +43,14 @@ def checkAudioBuffering(lines):
         return [LEVEL_CRITICAL, "Max Audio Buffering",
                 "Audio buffering hit the maximum value. This is an indicator of very high system load, will affect stream latency, and may even cause individual audio sources to stop working. Keep an eye on CPU usage especially, and close background programs if needed. <br><br>Occasionally, this can be caused by incorrect device timestamps. Restart OBS to reset buffering." + append]
 
-    buffering = search('total audio buffering is now', lines)
-    vals = [0, ]
-    if (len(buffering) > 0):
-        for i in buffering:
-            m = audiobuf_re.search(i)
-            if m:
-                vals.append(int(m.group("total")))
-
-        if (max(vals) > 500):
-            return [LEVEL_WARNING, "High Audio Buffering",
-                    "Audio buffering reached values above 500ms. This is an indicator of very high system load and will affect stream latency. Keep an eye on CPU usage especially, and close background programs if needed. Restart OBS to reset buffering."]
+    buffering = facts.timeline['audioBuffering']
+    if (buffering.maximum() > 500):
+        append = ""
+        rise, time = buffering.maxRise(BUFFERING_WINDOW)
+        if (rise >= BUFFERING_RISE):
+            minutes, seconds = divmod(int(time), 60)
+            append = "<br><br>Buffering grew by {:g}ms within {} seconds, {}:{:02d} after the log started.".format(rise, BUFFERING_WINDOW, minutes, seconds)
+        return [LEVEL_WARNING, "High Audio Buffering",
+                "Audio buffering reached values above 500ms. This is an indicator of very high system load and will affect stream latency. Keep an eye on CPU usage especially, and close background programs if needed. Restart OBS to reset buffering." + append]
 
     return None
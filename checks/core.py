@@ -1,13 +1,20 @@
 import html
 import re
-from pkg_resources import parse_version
 
 from .vars import *
 from .utils.utils import *
+from .utils.versions import parseVersion
+
+
+# Markers that make the rest of a log irrelevant for the analysis. A log
+# that is still being downloaded can be cut off once one of them was seen.
+CLASSIC_MARKER = ': Open Broadcaster Software v0.'
+AUTOCONFIG_MARKER = 'Auto-config wizard'
+STOP_MARKERS = (CLASSIC_MARKER, AUTOCONFIG_MARKER)
 
 
 def checkClassic(lines):
-    if (len(search(': Open Broadcaster Software v0.', lines)) > 0):
+    if (exists(CLASSIC_MARKER, lines)):
         return True, [LEVEL_CRITICAL, "OBS Classic",
                       """You are still using OBS Classic. This version is no longer supported. While we cannot and will not do anything to prevent you from using it, we cannot help with any issues that may come up. <br>It is recommended that you update to OBS Studio. <br><br>Further information on why you should update (and how): <a href="https://obsproject.com/forum/threads/how-to-easily-switch-to-obs-studio.55820/">OBS Classic to OBS Studio</a>."""]
     else:
@@ -15,38 +22,39 @@ def checkClassic(lines):
 
 
 def checkDual(lines):
-    if (len(search('Warning: OBS is already running!', lines)) > 0):
+    if (exists('Warning: OBS is already running!', lines)):
         return [LEVEL_CRITICAL, "Two Instances",
                 "Two instances of OBS are running. If you are not intentionally running two instances, they will likely interfere with each other and consume excessive resources. Stop one of them. Check Task Manager for stray OBS processes if you can't find the other one."]
 
 
 def checkAutoconfig(lines):
-    if (len(search('Auto-config wizard', lines)) > 0):
+    if (exists(AUTOCONFIG_MARKER, lines)):
         return [LEVEL_CRITICAL, "Auto-Config Wizard",
                 "The log contains an Auto-Config Wizard run. Results of this analysis are therefore inaccurate. Please post a link to a clean log file. " + cleanLog]
 
 
 def checkCPU(lines):
-    cpu = search('CPU Name', lines)
-    if (len(cpu) > 0):
-        if (('APU' in cpu[0]) or ('Pentium' in cpu[0]) or ('Celeron' in cpu[0])):
+    cpu = first('CPU Name', lines)
+    if (cpu is not None):
+        if (('APU' in cpu) or ('Pentium' in cpu) or ('Celeron' in cpu)):
             return [LEVEL_CRITICAL, "Insufficient Hardware",
                     "Your system is below minimum specs for OBS to run and may be too underpowered to livestream. There are no recommended settings we can suggest, but try the Auto-Config Wizard in the Tools menu. You may need to upgrade or replace your computer for a better experience."]
-        elif ('i3' in cpu[0]):
+        elif ('i3' in cpu):
             return [LEVEL_INFO, "Insufficient Hardware",
                     "Your system is below minimum specs for OBS to run and is too underpowered to livestream using software encoding. Livestreams and recordings will only run smoothly if you are using the hardware QuickSync encoder (via Settings -> Output)."]
 
 
 def getOBSVersionLine(lines):
-    versionLines = search('OBS', lines)
+    versionLines = positions('OBS', lines)
     correctLine = 0
-    if 'already running' in versionLines[correctLine]:
+    if 'already running' in lines[versionLines[correctLine]]:
         correctLine += 1
-    if 'multiple instances' in versionLines[correctLine]:
+    if 'multiple instances' in lines[versionLines[correctLine]]:
         correctLine += 1
-    return versionLines[correctLine]
+    return lines[versionLines[correctLine]]
 
 
+@profiled
 def getOBSVersionString(lines):
     versionLine = getOBSVersionLine(lines)
     if versionLine.split()[0] == 'OBS':
@@ -72,11 +80,15 @@ obsver_re = re.compile(r"""
     $
     """, re.VERBOSE)
 
+# parsed once, every log is compared against them
+BROKEN_UPDATE_VERSION = parseVersion('21.1.0')
+CURRENT_VERSION_PARSED = parseVersion(CURRENT_VERSION)
+
 
-def checkObsVersion(lines):
-    versionString = getOBSVersionString(lines)
+def checkObsVersion(facts):
+    versionString = facts.obsVersion
 
-    if parse_version(versionString) == parse_version('21.1.0'):
+    if facts.obsVersionParsed == BROKEN_UPDATE_VERSION:
         return [LEVEL_WARNING, "Broken Auto-Update",
                 """You are not running the latest version of OBS Studio. Automatic updates in version 21.1.0 are broken due to a bug. <br>Please update by downloading the latest installer from the <a href="https://obsproject.com/download">downloads page</a> and running it."""]
 
@@ -101,6 +113,6 @@ def checkObsVersion(lines):
         if m.group("special_type") == "rc":
             return [LEVEL_INFO, "Release Candidate OBS Version (%s)" % (html.escape(versionString)), """You are running a release candidate version of OBS. There is nothing wrong with this, but you may experience problems that you may not experience with fully released OBS versions. You are encouraged to upgrade to a released version of OBS as soon as one is available."""]
 
-    if parse_version(versionString.replace('-modified', '')) < parse_version(CURRENT_VERSION):
+    if parseVersion(versionString.replace('-modified', '')) < CURRENT_VERSION_PARSED:
         return [LEVEL_WARNING, "Old Version",
                 """You are not running the latest version of OBS Studio. Please update by downloading the latest installer from the <a href="https://obsproject.com/download">downloads page</a> and running it."""]
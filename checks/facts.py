@@ -0,0 +1,65 @@
+from functools import cached_property
+
+from .core import getOBSVersionLine, getOBSVersionString
+from .macos import getMacVersion
+from .scenes import Scenes
+from .sessions import OutputSessions
+from .timeline import Timeline
+from .utils.versions import parseVersion
+from .windows import getWindowsVersion
+
+
+class LogFacts:
+    """Values derived from a log that several checks depend on.
+
+    Every property is computed on first access and then reused for the rest
+    of the analysis. Checks that need any of these receive the facts object
+    and reach the log itself through ``facts.lines``.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    @cached_property
+    def obsVersionLine(self):
+        return getOBSVersionLine(self.lines)
+
+    @cached_property
+    def obsVersion(self):
+        return getOBSVersionString(self.lines)
+
+    @cached_property
+    def obsVersionParsed(self):
+        return parseVersion(self.obsVersion)
+
+    @cached_property
+    def windowsVersion(self):
+        return getWindowsVersion(self.lines)
+
+    @cached_property
+    def macVersion(self):
+        return getMacVersion(self.lines)
+
+    @cached_property
+    def scenes(self):
+        return Scenes(self.lines)
+
+    @cached_property
+    def outputSessions(self):
+        return OutputSessions(self.lines)
+
+    @cached_property
+    def timeline(self):
+        return Timeline(self.lines)
+
+    @property
+    def renderLag(self):
+        return self.outputSessions.maximum('renderLag')
+
+    @property
+    def encoderLag(self):
+        return self.outputSessions.maximum('encoderLag')
+
+    @property
+    def droppedFrames(self):
+        return self.outputSessions.maximum('droppedFrames')
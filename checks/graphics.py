@@ -3,26 +3,13 @@ from .utils.utils import *
 
 
 def checkInit(lines):
-    if (len(search('Failed to initialize video', lines)) > 0):
+    if (exists('Failed to initialize video', lines)):
         return [LEVEL_CRITICAL, "Initialize Failed",
                 "Failed to initialize video. Your GPU may not be supported, or your graphics drivers may need to be updated."]
 
 
-def getRenderLag(lines):
-    drops = search('rendering lag', lines)
-    val = 0
-    severity = 9000
-    for drop in drops:
-        v = float(drop[drop.find("(") + 1: drop.find(")")
-                       ].strip('%').replace(",", "."))
-        if (v > val):
-            val = v
-
-    return val
-
-
-def checkRenderLag(lines):
-    val = getRenderLag(lines)
+def checkRenderLag(facts):
+    val = facts.renderLag
 
     if (val != 0):
         if (val >= 10):
@@ -37,29 +24,27 @@ def checkRenderLag(lines):
 
 
 def checkAMDdrivers(lines):
-    if (len(search('The AMF Runtime is very old and unsupported', lines)) > 0):
+    if (exists('The AMF Runtime is very old and unsupported', lines)):
         return [LEVEL_WARNING, "AMD Drivers",
                 """The AMF Runtime is very old and unsupported. The AMF Encoder will no work properly or not show up at all. Consider updating your drivers by downloading the newest installer from <a href="https://support.amd.com/en-us/download">AMD's website</a>. """]
 
 
 def checkNVIDIAdrivers(lines):
-    if (len(search('[jim-nvenc] Current driver version does not support this NVENC version, please upgrade your driver', lines)) > 0):
+    if (exists('[jim-nvenc] Current driver version does not support this NVENC version, please upgrade your driver', lines)):
         return [LEVEL_WARNING, "Old NVIDIA Drivers",
                 """The installed NVIDIA driver does not support NVENC features needed for optimized encoders. Consider updating your drivers by downloading the newest installer from<a href="https://www.nvidia.de/Download/index.aspx">NVIDIA's website</a>. """]
 
 
-def checkVideoSettings(lines):
-    videoSettings = []
+def checkVideoSettings(facts):
+    lines = facts.lines
+    videoSettings = facts.outputSessions.videoSettings
     res = []
-    for i, s in enumerate(lines):
-        if "video settings reset:" in s:
-            videoSettings.append(i)
-    if (len(videoSettings) > 0):
-        basex, basey = lines[videoSettings[-1] + 1].split()[-1].split('x')
-        outx, outy = lines[videoSettings[-1] + 2].split()[-1].split('x')
-        fps_num, fps_den = lines[videoSettings[-1] + 4].split()[-1].split('/')
-        fmt = lines[videoSettings[-1] + 5].split()[-1]
-        yuv = lines[videoSettings[-1] + 6].split()[-1]
+    if (videoSettings is not None):
+        basex, basey = lines[videoSettings + 1].split()[-1].split('x')
+        outx, outy = lines[videoSettings + 2].split()[-1].split('x')
+        fps_num, fps_den = lines[videoSettings + 4].split()[-1].split('/')
+        fmt = lines[videoSettings + 5].split()[-1]
+        yuv = lines[videoSettings + 6].split()[-1]
         baseAspect = float(basex) / float(basey)
         outAspect = float(outx) / float(outy)
         fps = float(fps_num) / float(fps_den)
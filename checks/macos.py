@@ -6,12 +6,11 @@ from .utils.macosversions import *
 
 
 def getMacVersionLine(lines):
-    isMac = search('OS Name: Mac OS X', lines)
-    macVersion = search('OS Version:', lines)
-    if (len(isMac) > 0 and len(macVersion) > 0):
-        return macVersion[0]
+    if (exists('OS Name: Mac OS X', lines)):
+        return first('OS Version:', lines)
 
 
+@profiled
 def getMacVersion(lines):
     versionLine = getMacVersionLine(lines)
 
@@ -41,8 +40,8 @@ def getMacVersion(lines):
     return
 
 
-def checkMacVer(lines):
-    verinfo = getMacVersion(lines)
+def checkMacVer(facts):
+    verinfo = facts.macVersion
     if not verinfo:
         return
 
@@ -4,15 +4,9 @@ from .vars import *
 from .utils.utils import *
 
 
-def checkDrop(lines):
-    drops = search('insufficient bandwidth', lines)
-    val = 0
+def checkDrop(facts):
+    val = facts.droppedFrames
     severity = 9000
-    for drop in drops:
-        v = float(drop[drop.find("(") + 1: drop.find(")")
-                       ].strip('%').replace(",", "."))
-        if (v > val):
-            val = v
     if (val != 0):
         if (val >= 15):
             severity = LEVEL_CRITICAL
@@ -25,19 +19,19 @@ def checkDrop(lines):
 
 
 def checkKiller(lines):
-    if (len(search('Interface: Killer', lines)) > 0):
+    if (exists('Interface: Killer', lines)):
         return [LEVEL_INFO, "Killer NIC",
                 """Killer's Firewall is known for it's poor performance and issues when trying to stream. Please download the driver pack from <a href="https://www.killernetworking.com/killersupport/driver-downloads/category/other-downloads">the vendor's page</a> , completely uninstall all Killer NIC items and install their Driver only package."""]
 
 
 def checkWifi(lines):
-    if (len(search('802.11', lines)) > 0):
+    if (exists('802.11', lines)):
         return [LEVEL_WARNING, "Wi-Fi Streaming",
                 "In many cases, wireless connections can cause issues because of their unstable nature. Streaming really requires a stable connection. Often wireless connections are fine, but if you have problems, the first troubleshooting step would be to switch to wired. We highly recommend streaming on wired connections."]
 
 
 def checkBind(lines):
-    if (len(search('Binding to ', lines)) > 0):
+    if (exists('Binding to ', lines)):
         return [LEVEL_WARNING, "Binding to IP",
                 """Binding to a manually chosen IP address is rarely needed. Go to Settings -> Advanced -> Network and set "Bind to IP" back to "Default"."""]
 
@@ -63,8 +57,7 @@ x264stream_re = re.compile(r"stream")
 
 
 def checkDynamicBitrate(lines):
-    dynBrLines = search('Dynamic bitrate enabled', lines)
-    if (len(dynBrLines) > 0):
+    if (exists('Dynamic bitrate enabled', lines)):
         x264Lines = search('x264 encoder: ', lines)
         for i in x264Lines:
             if x264stream_re.search(i):
@@ -76,7 +69,6 @@ def checkDynamicBitrate(lines):
 
 
 def checkStreamDelay(lines):
-    delayLines = search('second delay active', lines)
-    if (len(delayLines) > 0):
+    if (exists('second delay active', lines)):
         return [LEVEL_INFO, "Stream Delay", "Stream Delay may currently be active. This means that your stream is being delayed by a certain number of seconds. If this is not what you intended, please disable it in Settings -> Advanced -> Stream Delay."]
     return None
@@ -0,0 +1,57 @@
+from bisect import bisect_right
+
+from .utils.utils import *
+
+
+class Scene:
+    """One scene of the 'Loaded scenes' section.
+
+    Spans the lines from its own '- scene' line up to (excluding) end: the
+    next scene, or for the last scene the next section separator.
+    """
+
+    def __init__(self, scenes, line, end):
+        self.scenes = scenes
+        self.line = line
+        self.end = end
+
+    @property
+    def name(self):
+        text = self.scenes.lines[self.line]
+        return text[text.find("'") + 1: text.rfind("'")]
+
+    def count(self, needle):
+        """Number of lines within the scene that contain needle."""
+        lines = self.scenes.lines
+        return sum(1 for i in range(self.line, self.end) if needle in lines[i])
+
+
+class Scenes:
+    """Scenes of a log and their sources.
+
+    Scene boundaries come from bisecting the positions of the scene and
+    section lines. Everything per scene only looks at the lines of that
+    scene, in place, so the work is linear in the number of scenes and
+    sources.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.scenes = []
+        starts = getScenes(lines)
+        if not starts:
+            return
+        sections = getSections(lines)
+        for i, line in enumerate(starts):
+            if i + 1 < len(starts):
+                end = starts[i + 1]
+            else:
+                j = bisect_right(sections, line)
+                end = sections[j] if j < len(sections) else len(lines)
+            self.scenes.append(Scene(self, line, end))
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def __iter__(self):
+        return iter(self.scenes)
@@ -0,0 +1,110 @@
+from .utils.utils import *
+
+
+SESSION_KINDS = ('Recording', 'Streaming', 'Replay Buffer')
+
+X264_STREAM_SETTINGS = "[x264 encoder: 'simple_h264_stream'] settings:"
+NVENC_STREAM_SETTINGS = "[NVENC encoder: 'streaming_h264'] settings:"
+VIDEO_SETTINGS = 'video settings reset:'
+
+# statistics an output logs when it stops, attribute -> marker
+STATISTICS = {'renderLag': 'rendering lag',
+              'encoderLag': 'skipped frames',
+              'droppedFrames': 'insufficient bandwidth'}
+
+# encoder settings an output logs when it starts, attribute -> marker
+SETTINGS = {'x264Settings': X264_STREAM_SETTINGS,
+            'nvencSettings': NVENC_STREAM_SETTINGS}
+
+
+class OutputSession:
+    """One recording, streaming or replay buffer session.
+
+    start and stop are line numbers of the session markers. x264Settings and
+    nvencSettings are the lines of the stream encoder settings logged when
+    the output started. renderLag, encoderLag and droppedFrames are the
+    highest percentages the output reported when it stopped.
+    """
+
+    def __init__(self, kind, start=None):
+        self.kind = kind
+        self.start = start
+        self.stop = None
+        self.x264Settings = None
+        self.nvencSettings = None
+        self.renderLag = 0
+        self.encoderLag = 0
+        self.droppedFrames = 0
+
+
+class OutputSessions:
+    """A log segmented into its output sessions.
+
+    Every session marker, encoder settings block and output statistic is
+    located once through the shared index and then assigned to its session:
+    settings to the next session that starts, statistics to the next
+    session that stops. Whatever comes after the last of those is kept in
+    ``trailing``, so maxima and last occurrences over all sessions match a
+    scan of the whole log.
+    """
+
+    def __init__(self, lines):
+        self.sessions = []
+        self.trailing = OutputSession(None)
+        self.videoSettings = None
+
+        events = []
+        # one scan per event type, the few hits are told apart by kind here
+        for event, suffix in (('start', 'Start =='), ('stop', 'Stop ==')):
+            for i in positions(' ' + suffix, lines):
+                for kind in SESSION_KINDS:
+                    if '== {} {}'.format(kind, suffix) in lines[i]:
+                        events.append((i, event, kind))
+        for attr, marker in SETTINGS.items():
+            events.extend((i, 'settings', attr) for i in positions(marker, lines))
+        for attr, marker in STATISTICS.items():
+            events.extend((i, 'statistic', attr) for i in positions(marker, lines))
+        videoSettings = positions(VIDEO_SETTINGS, lines)
+        if videoSettings:
+            self.videoSettings = videoSettings[-1]
+
+        running = {}
+        pending = self.trailing
+        for line, event, name in sorted(events):
+            if event == 'settings':
+                setattr(pending, name, line)
+            elif event == 'statistic':
+                setattr(pending, name, max(getattr(pending, name), getPercentage(lines[line])))
+            elif event == 'start':
+                session = running[name] = OutputSession(name, line)
+                session.x264Settings = pending.x264Settings
+                session.nvencSettings = pending.nvencSettings
+                pending.x264Settings = pending.nvencSettings = None
+                self.sessions.append(session)
+            else:
+                session = running.pop(name, None)
+                if session is None:
+                    # the start marker is missing, e.g. in a truncated log
+                    session = OutputSession(name)
+                    self.sessions.append(session)
+                session.stop = line
+                for attr in STATISTICS:
+                    setattr(session, attr, getattr(pending, attr))
+                    setattr(pending, attr, 0)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def started(self):
+        return any(s.start is not None for s in self.sessions)
+
+    def maximum(self, attr):
+        return max([getattr(s, attr) for s in self.sessions] + [getattr(self.trailing, attr)])
+
+    def last(self, attr):
+        """Last line of the given settings block in the whole log, or None."""
+        found = [getattr(s, attr) for s in self.sessions + [self.trailing] if getattr(s, attr) is not None]
+        return max(found) if found else None
@@ -3,22 +3,22 @@ from .utils.utils import *
 
 
 def checkMulti(lines):
-    mem = search('user is forcing shared memory', lines)
-    if (len(mem) > 0):
+    if (exists('user is forcing shared memory', lines)):
         return [LEVEL_WARNING, "Memory Capture",
                 """SLI/Crossfire Capture Mode (aka 'Shared memory capture') is very slow, and only to be used on SLI & Crossfire systems. <br><br>If you're using a laptop or a display with multiple graphics cards and your game is only running on one of them, consider switching OBS to run on the same GPU instead of enabling this setting. Guide available <a href="https://obsproject.com/wiki/Laptop-Troubleshooting">here</a>."""]
 
 
-def checkSources(lower, higher, lines):
+@profiled
+def checkSources(scene):
     res = None
     violation = False
-    monitor = search('monitor_capture', lines[lower:higher])
-    game = search('game_capture', lines[lower:higher])
-    if (len(monitor) > 0 and len(game) > 0):
+    monitor = scene.count('monitor_capture')
+    game = scene.count('game_capture')
+    if (monitor > 0 and game > 0):
         res = []
         res.append([LEVEL_WARNING, "Capture Interference",
                     "Display and Game Capture Sources interfere with each other. Never put them in the same scene."])
-    if (len(game) > 1):
+    if (game > 1):
         if (res is None):
             res = []
         violation = True
@@ -28,35 +28,32 @@ def checkSources(lower, higher, lines):
 
 
 def checkBrowserAccel(lines):
-    disabled = search('Browser Hardware Acceleration: false', lines)
-    blacklisted = search('[obs-browser]: Blacklisted device detected, disabling browser source hardware acceleration', lines)
-    if (len(disabled) > 0 and len(blacklisted) == 0):
+    disabled = exists('Browser Hardware Acceleration: false', lines)
+    blacklisted = exists('[obs-browser]: Blacklisted device detected, disabling browser source hardware acceleration', lines)
+    if (disabled and not blacklisted):
         return [LEVEL_WARNING, "Browser Not Accelerated",
                 "Browser hardware acceleration is currently disabled. Enabling acceleration is highly recommended due to the improvements to performance and significantly lower CPU usage for browser sources. This can be enabled in Settings -> Advanced."]
-    elif (len(blacklisted) > 0):
+    elif (blacklisted):
         return [LEVEL_INFO, "Browser Not Accelerated",
                 "Unfortunately, browser source hardware acceleration is not compatible with your system/graphics card. Because of this, browser sources will use extra CPU and may stutter. Try to use as few browser sources as possible."]
 
 
-def parseScenes(lines):
+def parseScenes(facts):
+    lines = facts.lines
     ret = []
-    hit = False
-    sceneLines = getScenes(lines)
-    sourceLines = search(' - source:', lines)
-    added = search('User added source', lines)
-    if ((len(sceneLines) > 0) and (len(sourceLines) > 0)):
-        sections = getSections(lines)
-        higher = 0
-        for s in sceneLines:
-            if (s != sceneLines[-1]):
-                higher = getNextPos(s, sceneLines)
-            else:
-                higher = getNextPos(s, sections)
-            m, h = checkSources(s, higher, lines)
-            if (not hit and m not in ret):
+    scenes = facts.scenes
+    if ((len(scenes) > 0) and exists(' - source:', lines)):
+        seen = set()
+        for scene in scenes:
+            m, hit = checkSources(scene)
+            # the same findings are reported once
+            key = None if m is None else tuple(i[1] for i in m)
+            if (key not in seen):
+                seen.add(key)
                 ret.append(m)
-                hit = h
-    elif (len(added) > 0):
+                if (hit):
+                    break
+    elif (exists('User added source', lines)):
         ret = []
     else:
         ret.append([[LEVEL_INFO, "No Scenes/Sources",
@@ -0,0 +1,148 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import cached_property
+from heapq import merge
+
+from .audio import audiobuf_re
+from .sessions import STATISTICS
+from .utils.utils import *
+
+
+# Every line of a log starts with the local time of day it was logged at,
+# "HH:MM:SS.mmm: ". Only the lines of events and every SAMPLE_STRIDE-th
+# line are timestamped: the samples make sure midnight is noticed even if
+# no event is logged for hours, without parsing every line of the log.
+
+DAY = 24 * 60 * 60
+SAMPLE_STRIDE = 1000
+
+
+def parseTimestamp(line):
+    """Seconds since midnight a line was logged at, None if it has no timestamp."""
+    if len(line) < 13 or line[2] != ':' or line[5] != ':' or line[8] != '.' or line[12] != ':':
+        return None
+    try:
+        return int(line[0:2]) * 3600 + int(line[3:5]) * 60 + int(line[6:8]) + int(line[9:12]) / 1000
+    except ValueError:
+        return None
+
+
+def getBufferingTotal(line):
+    m = audiobuf_re.search(line)
+    if m:
+        return int(m.group("total"))
+
+
+# event name -> (marker, value of a line with the marker or None)
+EVENTS = {
+    'audioBuffering': ('total audio buffering is now', getBufferingTotal),
+    'renderLag': (STATISTICS['renderLag'], getPercentage),
+    'encoderLag': (STATISTICS['encoderLag'], getPercentage),
+    'droppedFrames': (STATISTICS['droppedFrames'], getPercentage),
+}
+
+
+class Series:
+    """The values of one kind of event in the order they were logged.
+
+    times are in seconds since the first timestamped line of the log; they
+    are only worked out when first needed, most checks want the values.
+    """
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.lines = array('I')
+        self.values = array('d')
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, line, value):
+        self.lines.append(line)
+        self.values.append(value)
+
+    @cached_property
+    def times(self):
+        return self.timeline.elapsed(self.lines)
+
+    def maximum(self):
+        return max(self.values, default=0)
+
+    def between(self, start, end):
+        """Values logged from start up to (excluding) end seconds."""
+        times = self.times
+        return self.values[bisect_left(times, start):bisect_left(times, end)]
+
+    def maxRise(self, window):
+        """Largest growth of the value within window seconds.
+
+        Returns (rise, time) with the time the growth was reached at, or
+        (0, None) if the value never grew.
+        """
+        best = (0, None)
+        times = self.times
+        lowest = deque()  # indices of increasing values within the window
+        for i, (time, value) in enumerate(zip(times, self.values)):
+            while lowest and times[lowest[0]] < time - window:
+                lowest.popleft()
+            while lowest and self.values[lowest[-1]] >= value:
+                lowest.pop()
+            lowest.append(i)
+            rise = value - self.values[lowest[0]]
+            if rise > best[0]:
+                best = (rise, time)
+        return best
+
+
+class Timeline:
+    """Timestamped numeric events of a log, one Series per kind in EVENTS.
+
+    A Series is only built when it is first asked for. Time-of-day stamps
+    are turned into seconds since the first timestamped line; whenever the
+    time of day jumps back by more than half a day, midnight has passed.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.series = {}
+
+    def __getitem__(self, name):
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = self._build(name)
+        return series
+
+    def _build(self, name):
+        lines = self.lines
+        marker, getValue = EVENTS[name]
+        series = Series(self)
+        for i in positions(marker, lines):
+            value = getValue(lines[i])
+            if value is not None:
+                series.append(i, value)
+        return series
+
+    def elapsed(self, numbers):
+        """Seconds since the first timestamped line, for each of the sorted line numbers."""
+        lines = self.lines
+        times = array('d')
+        samples = ((i, False) for i in range(0, len(lines), SAMPLE_STRIDE))
+        start = None
+        last = None
+        days = 0
+        elapsed = 0.0
+        for i, wanted in merge(samples, ((i, True) for i in numbers)):
+            time = parseTimestamp(lines[i])
+            if time is not None:
+                if last is not None and last - time > DAY / 2:
+                    days += 1
+                last = time
+                if start is None:
+                    start = time
+                elapsed = days * DAY + time - start
+            if wanted:
+                # a line without a timestamp still gets a time, that of
+                # the line before it
+                times.append(elapsed)
+        return times
@@ -0,0 +1,154 @@
+import asyncio
+import codecs
+import json
+
+import aiohttp
+
+from ..core import STOP_MARKERS
+from .fetchers import *
+from .logindex import LogBuffer
+
+
+# Asynchronous counterparts of the fetchers in fetchers.py, used by the web
+# server. All requests share one connection-pooled aiohttp session.
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+TOTAL_TIMEOUT = 60
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_CONNECTIONS = 200
+MAX_CONNECTIONS_PER_HOST = 20
+
+_session = None
+
+
+def getSession():
+    """Returns the shared session, creating it on first use in the running loop."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS,
+                                         limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                                         keepalive_timeout=30,
+                                         ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT,
+                                        sock_connect=CONNECT_TIMEOUT,
+                                        sock_read=READ_TIMEOUT)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def closeSession():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def checkLength(resp, maxBytes):
+    if resp.content_length is not None and resp.content_length > maxBytes:
+        raise BodyTooLarge('{} is {} bytes, limit is {}'.format(resp.url, resp.content_length, maxBytes))
+
+
+async def readBody(resp, maxBytes=None):
+    maxBytes = maxBytes or MAX_BODY_BYTES
+    checkLength(resp, maxBytes)
+    chunks = []
+    total = 0
+    async for chunk in resp.content.iter_chunked(65536):
+        total += len(chunk)
+        if total > maxBytes:
+            raise BodyTooLarge('{} exceeds {} bytes'.format(resp.url, maxBytes))
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def checkStatus(resp, url):
+    if resp.status != 200:
+        raise LogUnavailable('{} returned status {}'.format(url, resp.status))
+
+
+async def getJson(url):
+    async with getSession().get(url) as resp:
+        checkStatus(resp, url)
+        return json.loads(await readBody(resp))
+
+
+async def readLog(content, charset, source, maxBytes=None):
+    """Reads a plain text log from an aiohttp StreamReader into a LogBuffer while it arrives.
+
+    Returns (logLines, partial, done); partial is True when the log was cut
+    off at one of STOP_MARKERS, done is False if content was not read to
+    its end because of that."""
+    maxBytes = maxBytes or MAX_BODY_BYTES
+    decoder = codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+    logLines = LogBuffer()
+    splitter = LineSplitter()
+    total = 0
+    async for chunk in content.iter_chunked(65536):
+        total += len(chunk)
+        if total > maxBytes:
+            raise BodyTooLarge('{} exceeds {} bytes'.format(source, maxBytes))
+        lines = splitter.feed(decoder.decode(chunk))
+        if lines:
+            added = logLines.extend(lines)
+            if any(marker in added for marker in STOP_MARKERS):
+                return logLines, True, False
+    lines = splitter.feed(decoder.decode(b'', final=True))
+    lines.append(splitter.close())
+    last = logLines.extend(lines)
+    return logLines, any(marker in last for marker in STOP_MARKERS), True
+
+
+async def streamLog(url, maxBytes=None):
+    """Downloads a plain text log into a LogBuffer while it arrives.
+
+    Returns (logLines, partial); partial is True when the download was cut
+    off at one of STOP_MARKERS. Raises LogUnavailable for a non-200
+    response, which may be temporary and must not be cached as no log."""
+    maxBytes = maxBytes or MAX_BODY_BYTES
+    async with getSession().get(url) as resp:
+        checkStatus(resp, url)
+        checkLength(resp, maxBytes)
+        logLines, partial, done = await readLog(resp.content, resp.charset, url, maxBytes)
+        if not done:
+            resp.close()
+        return logLines, partial
+
+
+async def receiveLog(request, maxBytes=None):
+    """Reads a log uploaded as the body of an aiohttp.web request.
+
+    aiohttp undoes chunked transfer and a gzip or deflate Content-Encoding
+    of the body, the size limit applies to the decoded log. Returns
+    (description, logLines, partial) or None if the body is empty."""
+    maxBytes = maxBytes or MAX_BODY_BYTES
+    if request.content_length is not None and request.content_length > maxBytes:
+        raise BodyTooLarge('upload is {} bytes, limit is {}'.format(request.content_length, maxBytes))
+    logLines, partial, _ = await readLog(request.content, request.charset, 'upload', maxBytes)
+    if not logLines.text:
+        return None
+    return getDescription(logLines), logLines, partial
+
+
+async def fetchSource(source):
+    """Async version of fetchers.fetchSource."""
+    provider = source.provider
+    if provider.getLines is None:
+        logLines, partial = await streamLog(source.url)
+        return None, logLines, partial
+    obj = await getJson(source.url)
+    description = provider.getDescription(obj) if provider.getDescription is not None else None
+    return description, provider.getLines(obj), False
+
+
+async def fetchLog(source):
+    """Async version of loganalyzer.fetchLog for a LogSource from parseUrl().
+
+    Returns (description, logLines, partial) or None if there is no log."""
+    description, logLines, partial = await fetchSource(source)
+    if not logLines.text:
+        # an empty paste still splits into one empty line
+        return None
+    if description is None:
+        description = getDescription(logLines)
+    return description, logLines, partial
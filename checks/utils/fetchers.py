@@ -1,118 +1,355 @@
-import requests
+import codecs
+import json
 import re
+import threading
 
+from ..core import STOP_MARKERS
+from .logindex import LogBuffer, MappedLogIndex
 
-# gist.github.com
+
+# http
 # --------------------------------------
 
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+MAX_BODY_BYTES = 32 * 1024 * 1024
 
-def matchGist(url):
-    return re.match(
-        r"(?i)\b((?:https?:(?:/{1,3}gist\.github\.com)/)(anonymous/)?([a-z0-9]{32}))", url)
 
+class BodyTooLarge(Exception):
+    pass
 
-def getGist(inputUrl):
-    API_URL = "https://api.github.com"
-    gistId = inputUrl
-    return requests.get('{0}/gists/{1}'.format(API_URL, gistId)).json()
 
+class LogUnavailable(Exception):
+    """The paste host answered with an error status instead of the log."""
 
-def getLinesGist(gistObject):
-    files = [(v, k) for (k, v) in gistObject['files'].items()]
-    return files[0][0]['content'].split('\n')
 
+def makeSession():
+    """Creates a pooled session that retries failed GETs with backoff."""
+    # requests takes a good part of the startup time, a local log does not need it
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    retry = Retry(total=3, connect=3, read=2, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET']),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+    s = requests.Session()
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    return s
 
-def getDescriptionGist(gistObject):
-    desc = gistObject['description']
-    if (desc == ""):
-        desc = gistObject['id']
-    return [0, "DESCRIPTION", desc]
 
+_session = None
+_sessionLock = threading.Lock()
 
-# hastebin.com
+
+def getSession():
+    """Returns the shared session, creating it on first use."""
+    global _session
+    with _sessionLock:
+        if _session is None:
+            _session = makeSession()
+        return _session
+
+
+def httpGet(url):
+    """Starts a streamed GET on the shared session; the body is not read yet."""
+    resp = getSession().get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    length = resp.headers.get('Content-Length')
+    if length is not None and length.isdigit() and int(length) > MAX_BODY_BYTES:
+        resp.close()
+        raise BodyTooLarge('{} is {} bytes, limit is {}'.format(url, length, MAX_BODY_BYTES))
+    return resp
+
+
+def iterBody(resp, chunkSize=65536):
+    total = 0
+    for chunk in resp.iter_content(chunkSize):
+        total += len(chunk)
+        if total > MAX_BODY_BYTES:
+            raise BodyTooLarge('{} exceeds {} bytes'.format(resp.url, MAX_BODY_BYTES))
+        yield chunk
+
+
+def readText(resp):
+    with resp:
+        body = b''.join(iterBody(resp))
+    return body.decode(resp.encoding or 'utf-8', errors='replace')
+
+
+def getText(url):
+    return readText(httpGet(url))
+
+
+def getJson(url):
+    return json.loads(getText(url))
+
+
+# streaming
 # --------------------------------------
 
 
-def matchHaste(url):
-    return re.match(
-        r"(?i)\b((?:https?:(?:/{1,3}(www\.)?hastebin\.com)/)([a-z0-9]{10}))", url)
+# longer lines are cut off; no line of a real log comes close
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class LineSplitter:
+    """Splits text that arrives in pieces into lines on '\\n'.
+
+    Only newly arrived text is split. The unfinished last line is kept as
+    a list of its parts, so a long line costs linear time, not quadratic,
+    and it is cut off at maxLength characters."""
+
+    def __init__(self, maxLength=MAX_LINE_LENGTH):
+        self.maxLength = maxLength
+        self._parts = []
+        self._length = 0
+
+    def feed(self, text):
+        """Returns the lines that text completes."""
+        lines = text.split('\n')
+        last = lines.pop()
+        if lines:
+            lines[0] = self._finish(lines[0])
+            if len(text) > self.maxLength:
+                lines = [line[:self.maxLength] for line in lines]
+        self._add(last)
+        return lines
+
+    def close(self):
+        """Returns the last line, which has no '\\n' after it."""
+        return self._finish('')
+
+    def _add(self, part):
+        room = self.maxLength - self._length
+        if part and room > 0:
+            part = part[:room]
+            self._parts.append(part)
+            self._length += len(part)
+
+    def _finish(self, part):
+        self._add(part)
+        line = ''.join(self._parts)
+        self._parts = []
+        self._length = 0
+        return line
+
+
+def iterLines(resp, chunkSize=65536):
+    """Yields the body of a streamed response as batches of lines.
+
+    Lines are split on '\\n' only, exactly like the LogBuffer returned by
+    the getLines* functions."""
+    decoder = codecs.getincrementaldecoder(resp.encoding or 'utf-8')(errors='replace')
+    splitter = LineSplitter()
+    with resp:
+        for chunk in iterBody(resp, chunkSize):
+            lines = splitter.feed(decoder.decode(chunk))
+            if lines:
+                yield lines
+    lines = splitter.feed(decoder.decode(b'', final=True))
+    lines.append(splitter.close())
+    yield lines
+
+
+def streamText(url):
+    resp = httpGet(url)
+    if resp.status_code != 200:
+        resp.close()
+        return
+    yield from iterLines(resp)
 
 
-def getHaste(hasteId):
-    API_URL = "https://hastebin.com"
-    return requests.get('{0}/documents/{1}'.format(API_URL, hasteId)).json()
+# providers
+# --------------------------------------
+# Every paste host is a Provider. The patterns of all of them are compiled
+# into one regex, so a URL is matched a single time; the LogSource it is
+# parsed into is then used to validate, key and fetch the log.
+
+
+class Provider:
+    """A paste host: the pattern of its URLs and where its logs are.
+
+    pattern matches the start of a URL, without flags (all patterns are
+    case-insensitive), and has one group named id. url is formatted with
+    that id. Hosts with a JSON API set getLines to take the log out of the
+    JSON object at url, and optionally getDescription; for all others url
+    is the raw log, which is streamed. key() turns an id into the cache
+    key of the log."""
 
+    def __init__(self, name, pattern, url, getLines=None, getDescription=None, normalize=None):
+        self.name = name
+        self.pattern = pattern
+        self.url = url
+        self.getLines = getLines
+        self.getDescription = getDescription
+        self.normalize = normalize
+        self.regex = re.compile(r"(?i)\b" + pattern)
+
+    def match(self, url):
+        return self.regex.match(url)
+
+    def key(self, id):
+        if self.normalize is not None:
+            id = self.normalize(id)
+        return '{}/{}'.format(self.name, id)
+
+
+class LogSource:
+    """A paste URL parsed by parseUrl(): the provider and the id of the log there."""
+
+    def __init__(self, provider, id):
+        self.provider = provider
+        self.id = id
+        self.key = provider.key(id)
+        self.url = provider.url.format(id)
+
+    def __repr__(self):
+        return 'LogSource({!r}, {!r})'.format(self.provider.name, self.id)
+
+
+PROVIDERS = {}  # name -> Provider, in order of registration
+_router = None
 
-def getLinesHaste(hasteObject):
-    text = hasteObject['data']
-    return text.split('\n')
+
+def register(provider):
+    """Adds a paste host; hosts registered first win when patterns overlap."""
+    global _router
+    PROVIDERS[provider.name] = provider
+    _router = None
+    return provider
+
+
+def router():
+    """The regex matching the URLs of all providers, with one group per provider."""
+    global _router
+    if _router is None:
+        _router = re.compile(r"(?i)\b(?:" + '|'.join(
+            '(?P<{0}>{1})'.format(p.name, p.pattern.replace('(?P<id>', '(?P<{}_id>'.format(p.name)))
+            for p in PROVIDERS.values()) + ')')
+    return _router
+
+
+def parseUrl(url):
+    """Returns the LogSource of a supported paste URL, None for any other."""
+    m = router().match(url)
+    if m is None:
+        return None
+    # the provider's group closes after its id group, it is the last one
+    name = m.lastgroup
+    return LogSource(PROVIDERS[name], m.group(name + '_id'))
+
+
+def fetchSource(source):
+    """Fetches the log of a LogSource; returns (description, logLines, partial).
+
+    description is None if the host has none, logLines is empty or None if
+    there is no log."""
+    provider = source.provider
+    if provider.getLines is None:
+        logLines, partial = readLogStream(streamText(source.url))
+        return None, logLines, partial
+    obj = getJson(source.url)
+    description = provider.getDescription(obj) if provider.getDescription is not None else None
+    return description, provider.getLines(obj), False
+
+
+def readLogStream(batches):
+    logLines = LogBuffer()
+    for batch in batches:
+        chunk = logLines.extend(batch)
+        if any(marker in chunk for marker in STOP_MARKERS):
+            # nothing after this point changes the result, stop downloading
+            batches.close()
+            return logLines, True
+    return logLines, False
+
+
+def readLogText(text):
+    """A log sent as text, read like a downloaded one.
+
+    Returns (description, logLines, partial) or None if text is empty;
+    partial is True if the text has one of STOP_MARKERS, where a download
+    would have stopped."""
+    if not text:
+        return None
+    logLines = LogBuffer(text)
+    return getDescription(logLines), logLines, any(marker in text for marker in STOP_MARKERS)
 
 
 def getDescription(lines):
     return [0, "DESCRIPTION", lines[0]]
 
 
-# obsproject.com
+# gist.github.com
 # --------------------------------------
 
 
-def matchObs(url):
-    return re.match(
-        r"(?i)\b((?:https?:(?:/{1,3}(www\.)?obsproject\.com)/logs/)(.{16}))", url)
+def getLinesGist(gistObject):
+    files = [(v, k) for (k, v) in gistObject['files'].items()]
+    return LogBuffer(files[0][0]['content'])
 
 
-def getObslog(obslogId):
-    API_URL = "https://obsproject.com/logs"
-    return requests.get('{0}/{1}'.format(API_URL, obslogId)).text
+def getDescriptionGist(gistObject):
+    desc = gistObject['description']
+    if (desc == ""):
+        desc = gistObject['id']
+    return [0, "DESCRIPTION", desc]
 
 
-def getLinesObslog(obslogText):
-    return obslogText.split('\n')
+GIST = register(Provider(
+    'gist', r"(?:https?:(?:/{1,3}gist\.github\.com)/)(?:anonymous/)?(?P<id>[a-z0-9]{32})",
+    "https://api.github.com/gists/{}", getLinesGist, getDescriptionGist, normalize=str.lower))
 
 
-# pastebin.com
+# hastebin.com
 # --------------------------------------
 
 
-def matchPastebin(url):
-    return re.match(
-        r"(?i)\b((?:https?:(?:/{1,3}(www\.)?pastebin\.com/))(?:raw/)?(.{8}))", url)
+def getLinesHaste(hasteObject):
+    return LogBuffer(hasteObject['data'])
+
+
+HASTE = register(Provider(
+    'haste', r"(?:https?:(?:/{1,3}(?:www\.)?hastebin\.com)/)(?P<id>[a-z0-9]{10})",
+    "https://hastebin.com/documents/{}", getLinesHaste))
 
 
-def getRawPaste(obslogId):
-    API_URL = "https://pastebin.com/raw"
-    return requests.get('{0}/{1}'.format(API_URL, obslogId)).text
+# obsproject.com
+# --------------------------------------
 
 
-def getLinesPaste(obslogText):
-    return obslogText.split('\n')
+OBS = register(Provider(
+    'obs', r"(?:https?:(?:/{1,3}(?:www\.)?obsproject\.com)/logs/)(?P<id>.{16})",
+    "https://obsproject.com/logs/{}"))
 
 
-# discord
+# pastebin.com
 # --------------------------------------
 
 
-def matchDiscord(url):
-    return re.match(
-        r"(?i)\b((?:https?:(?:/{1,3}cdn\.discordapp\.com)/)(attachments/)([0-9]{18}/[0-9]{18}/(?:[0-9\-\_]{19}|message).txt))", url)
+PASTEBIN = register(Provider(
+    'pastebin', r"(?:https?:(?:/{1,3}(?:www\.)?pastebin\.com/))(?:raw/)?(?P<id>.{8})",
+    "https://pastebin.com/raw/{}"))
 
 
-def getRawDiscord(obslogId):
-    API_URL = "https://cdn.discordapp.com/attachments"
-    resp = requests.get('{0}/{1}'.format(API_URL, obslogId))
-    if resp.status_code == 200:
-        return resp.text
-    return ""
+# discord
+# --------------------------------------
 
 
-def getLinesDiscord(obslogText):
-    return obslogText.split('\n')
+DISCORD = register(Provider(
+    'discord', r"(?:https?:(?:/{1,3}cdn\.discordapp\.com)/)attachments/(?P<id>[0-9]{18}/[0-9]{18}/(?:[0-9\-\_]{19}|message).txt)",
+    "https://cdn.discordapp.com/attachments/{}"))
 
 
 # local file
-def getLinesLocal(filename):
+def openLocal(filename):
+    """Memory-maps a local log, None if it is empty.
+
+    Raises OSError if the file cannot be read, that is not a missing log."""
     try:
-        with open(filename, "r") as f:
-            return f.readlines()
-    except:
+        return MappedLogIndex(filename)
+    except ValueError:
+        # an empty file cannot be mapped
         return
@@ -0,0 +1,392 @@
+import errno
+import mmap
+import os
+import stat
+import tempfile
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, repeat
+from operator import add
+
+
+class LogIndex:
+    """Line-oriented substring index over a single log.
+
+    The log is concatenated into one string when the index is built, next to
+    a table of line start offsets. Every needle is then located with
+    ``str.find`` over that string, which is a single C-level scan per
+    distinct needle, and the matching line numbers are memoized so repeated
+    queries for the same needle cost O(hits).
+
+    ``scanned`` counts the lines searched so far, memoized lookups add none.
+
+    The index also behaves like the list of lines it was built from
+    (``len()``, indexing, slicing and iteration), so it can be passed to
+    checks in place of a plain list. Lines can be appended with ``extend()``
+    while a log is still being downloaded.
+    """
+
+    scanned = 0
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.starts = list(accumulate(map(len, lines), initial=0))
+        self._text = ''.join(lines)
+        self._chunks = []
+        self._hits = {}
+
+    @property
+    def text(self):
+        if self._chunks:
+            self._text = ''.join([self._text] + self._chunks)
+            self._chunks = []
+        return self._text
+
+    def extend(self, lines):
+        """Appends complete lines and returns their concatenated text."""
+        chunk = ''.join(lines)
+        ends = accumulate(map(len, lines), initial=self.starts[-1])
+        next(ends)
+        self.starts.extend(ends)
+        self.lines.extend(lines)
+        self._chunks.append(chunk)
+        self._hits.clear()
+        return chunk
+
+    def __reduce__(self):
+        # only the lines cross process boundaries, the rest is rebuilt
+        return (LogIndex, (self.lines,))
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, key):
+        return self.lines[key]
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def lineAt(self, offset):
+        return bisect_right(self.starts, offset) - 1
+
+    def _find(self, needle, start=0):
+        # lines are concatenated without a separator, so a match may
+        # straddle two lines; those are skipped
+        text = self.text
+        starts = self.starts
+        pos = text.find(needle, start)
+        while pos != -1:
+            line = self.lineAt(pos)
+            if pos + len(needle) <= starts[line + 1]:
+                return pos, line
+            pos = text.find(needle, pos + 1)
+        return -1, -1
+
+    def _scan(self, needle):
+        starts = self.starts
+        hits = []
+        pos, line = self._find(needle)
+        while pos != -1:
+            hits.append(line)
+            # continue after the end of the matching line, every line is
+            # reported at most once
+            pos, line = self._find(needle, starts[line + 1])
+        return hits
+
+    def positions(self, needle):
+        hits = self._hits.get(needle)
+        if hits is None:
+            hits = self._hits[needle] = self._scan(needle)
+            self.scanned += len(self)
+        return hits
+
+    def all(self, needle):
+        lines = self.lines
+        return [lines[i] for i in self.positions(needle)]
+
+    def first(self, needle):
+        hits = self._hits.get(needle)
+        if hits is not None:
+            return self.lines[hits[0]] if hits else None
+        pos, line = self._find(needle)
+        if pos == -1:
+            self.scanned += len(self)
+            return None
+        self.scanned += line + 1
+        return self.lines[line]
+
+    def count(self, needle):
+        return len(self.positions(needle))
+
+    def exists(self, needle):
+        hits = self._hits.get(needle)
+        if hits is not None:
+            return len(hits) > 0
+        pos, line = self._find(needle)
+        self.scanned += len(self) if pos == -1 else line + 1
+        return pos != -1
+
+
+CHUNK_SIZE = 1 << 20
+
+
+def lineStarts(data, newline, release=None):
+    """Offset table of the lines of a str, bytes or mmap.
+
+    One entry for the start of every line, where a newline at the very end
+    does not start another one, followed by len(data). The data is split
+    one chunk at a time, so only a chunk worth of line objects ever exists
+    at once; release(start, end) is called for every chunk done with.
+    """
+    size = len(data)
+    starts = array('I' if size < 1 << 32 else 'Q')
+    pos = 0
+    while pos < size:
+        end = data.find(newline, min(pos + CHUNK_SIZE, size) - 1)
+        end = size if end == -1 else end + 1
+        parts = data[pos:end].split(newline)
+        starts.extend(accumulate(map(add, map(len, parts[:-1]), repeat(1)), initial=pos))
+        if not parts[-1]:
+            # the chunk ended with a newline, its end starts the next one
+            starts.pop()
+        if release is not None:
+            release(pos, end)
+        pos = end
+    starts.append(size)
+    return starts
+
+
+def splitStarts(data, newline, release=None):
+    """Like lineStarts, but split like str.split: every line ends one past
+    its newline, and a newline at the very end starts an empty last line."""
+    starts = lineStarts(data, newline, release)
+    size = len(data)
+    if not size or data[size - 1:] == newline:
+        starts.append(size + 1)
+    else:
+        starts[-1] = size + 1
+    return starts
+
+
+class Lines:
+    """Read-only sequence of the lines of an index, made on access.
+
+    Slicing returns another Lines over the same index, nothing is copied.
+    """
+
+    def __init__(self, index, indices=None):
+        self.index = index
+        self.indices = range(len(index.starts) - 1) if indices is None else indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return Lines(self.index, self.indices[key])
+        return self.index._line(self.indices[key])
+
+    def __iter__(self):
+        line = self.index._line
+        for i in self.indices:
+            yield line(i)
+
+
+class LogBuffer(LogIndex):
+    """LogIndex that keeps the log as the text it was fetched as.
+
+    The text is split on '\n' like ``text.split('\n')``, but instead of one
+    string object per line only an offset table is kept (4 bytes per line),
+    and a line is sliced out of the text when it is looked at. The text is
+    searched as it is: a needle without a newline cannot straddle lines.
+    """
+
+    def __init__(self, text=None):
+        self._text = text or ''
+        self._chunks = []
+        self._hits = {}
+        if text is None:
+            # no lines yet, they are added with extend()
+            self.starts = array('I', [0])
+        else:
+            self.starts = splitStarts(self._text, '\n')
+        self.lines = Lines(self)
+
+    def extend(self, lines):
+        """Appends complete lines and returns the text that was added."""
+        chunk = '\n'.join(lines)
+        if len(self.starts) > 1:
+            chunk = '\n' + chunk
+        ends = accumulate(map(add, map(len, lines), repeat(1)), initial=self.starts[-1])
+        next(ends)
+        self.starts.extend(ends)
+        self.lines = Lines(self)
+        self._chunks.append(chunk)
+        self._hits.clear()
+        return chunk
+
+    def __reduce__(self):
+        return (LogBuffer, (self.text,) if len(self) else ())
+
+    def _line(self, i):
+        starts = self.starts
+        return self.text[starts[i]:starts[i + 1] - 1]
+
+
+# not available on every platform, pages are then left to the OS
+DONTNEED = getattr(mmap, 'MADV_DONTNEED', None)
+# not available on Windows, lines are then sliced from the mapping
+PREAD = getattr(os, 'pread', None)
+
+
+class MappedLogIndex(LogIndex):
+    """LogIndex over a memory-mapped local file.
+
+    Needles are searched in the raw bytes of the mapping and only the lines
+    a check actually looks at are decoded, so memory use does not grow with
+    the size of the log apart from the line offset table (4 bytes per line
+    for files below 4 GiB).
+    """
+
+    WINDOW_SIZE = 16 << 20
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.fd = os.open(filename, os.O_RDONLY)
+        try:
+            if stat.S_ISDIR(os.fstat(self.fd).st_mode):
+                # would only fail to map with a vague EINVAL
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), filename)
+            # raises ValueError for an empty file, which cannot be mapped
+            self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        self.starts = self._lineStarts()
+        self.lines = Lines(self)
+        self._hits = {}
+
+    def _lineStarts(self):
+        return lineStarts(self.map, b'\n', self._release)
+
+    def __reduce__(self):
+        return (MappedLogIndex, (self.filename,))
+
+    @property
+    def text(self):
+        raise TypeError('the text of a mapped log is not held in memory')
+
+    def extend(self, lines):
+        raise TypeError('a mapped log cannot be extended')
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    def _read(self, start, end):
+        # read, not sliced from the mapping: a fault maps a whole folio of
+        # the page cache, which for a few scattered lines adds up quickly
+        if PREAD is None:
+            return self.map[start:end]
+        return PREAD(self.fd, end - start, start)
+
+    def _line(self, i):
+        starts = self.starts
+        data = self._read(starts[i], starts[i + 1])
+        if data.endswith(b'\r\n'):
+            # same as reading the file in text mode
+            data = data[:-2] + b'\n'
+        return data.decode('utf-8', 'replace')
+
+    def _find(self, needle, start=0):
+        # lines keep their newline in the mapping, a needle without one
+        # cannot straddle two lines
+        data = self.map
+        needle = needle.encode('utf-8')
+        size = len(data)
+        while start < size:
+            # one window at a time, pages already searched are released so
+            # the resident size stays bounded while scanning a huge file
+            end = min(start + self.WINDOW_SIZE, size)
+            pos = data.find(needle, start, min(end + len(needle) - 1, size))
+            if pos != -1:
+                return pos, self.lineAt(pos)
+            self._release(start, end)
+            start = end
+        return -1, -1
+
+    def _scan(self, needle):
+        # like LogIndex._scan, the pages behind the last hit are released
+        # a window at a time, not after every hit
+        starts = self.starts
+        hits = []
+        done = 0
+        pos, line = self._find(needle)
+        while pos != -1:
+            hits.append(line)
+            if pos - done >= self.WINDOW_SIZE:
+                self._release(done, pos)
+                done = pos
+            pos, line = self._find(needle, starts[line + 1])
+        return hits
+
+    def all(self, needle):
+        lines = self.lines
+        starts = self.starts
+        res = []
+        done = 0
+        for i in self.positions(needle):
+            res.append(lines[i])
+            if starts[i] - done >= self.WINDOW_SIZE:
+                self._release(done, starts[i])
+                done = starts[i]
+        return res
+
+    def _release(self, start, end):
+        if DONTNEED is not None:
+            start -= start % mmap.PAGESIZE
+            end -= end % mmap.PAGESIZE
+            if end > start:
+                self.map.madvise(DONTNEED, start, end - start)
+
+
+# tmpfs where there is one, so shared logs never touch a disk
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+class SharedLogBuffer(MappedLogIndex):
+    """A LogBuffer handed to another process through shared memory.
+
+    write() puts the text of a log into a new file in SHARED_DIR. Only the
+    name of that file crosses the process boundary, the receiving process
+    maps it and searches it in place. Lines are split exactly like those of
+    a LogBuffer. The writer removes the file once it is done with it.
+    """
+
+    @staticmethod
+    def write(text):
+        """Writes text to a new shared file and returns its name."""
+        fd, filename = tempfile.mkstemp(prefix='loganalyzer-', suffix='.log', dir=SHARED_DIR)
+        with open(fd, 'wb') as f:
+            # encoded one chunk at a time, no second copy of the whole log
+            for pos in range(0, len(text), CHUNK_SIZE):
+                f.write(text[pos:pos + CHUNK_SIZE].encode('utf-8', 'surrogateescape'))
+        return filename
+
+    def __reduce__(self):
+        return (SharedLogBuffer, (self.filename,))
+
+    def _lineStarts(self):
+        return splitStarts(self.map, b'\n', self._release)
+
+    def _release(self, start, end):
+        # the file is in memory anyway, dropping pages from the mapping
+        # would only have them faulted in again
+        pass
+
+    def _line(self, i):
+        starts = self.starts
+        return self._read(starts[i], starts[i + 1] - 1).decode('utf-8', 'surrogateescape')
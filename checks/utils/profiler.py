@@ -0,0 +1,127 @@
+import contextlib
+import contextvars
+import functools
+import time
+
+
+# Profiler of the analysis. It is off unless analyzeLog is given a Profiler,
+# which is then made active for the thread running the checks. Helpers
+# decorated with @profiled or @profiledScan report to the active profiler.
+
+_active = contextvars.ContextVar('profiler', default=None)
+
+
+class Profiler:
+    """Collects wall time, call count and lines scanned per check and helper.
+
+    Times are inclusive: a helper called from a check counts towards both.
+    Lines scanned are reported by the lookup helpers and summed up into
+    every check or helper they were called from; a lookup answered from
+    the memo of a LogIndex scans none. Profilers of several
+    analyses can be merged into one for a report over a whole corpus.
+    """
+
+    def __init__(self):
+        self.stats = {}  # name -> [kind, calls, seconds, lines]
+        self.logs = 0
+        self._stack = []
+
+    @contextlib.contextmanager
+    def measure(self, name, lines=0, kind='check'):
+        self._stack.append(lines)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            scanned = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += scanned
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = [kind, 0, 0.0, 0]
+            stat[1] += 1
+            stat[2] += elapsed
+            stat[3] += scanned
+
+    def addLines(self, lines):
+        """Counts lines scanned towards the innermost measurement."""
+        self._stack[-1] += lines
+
+    def merge(self, other):
+        self.logs += other.logs
+        for name, (kind, calls, seconds, lines) in other.stats.items():
+            stat = self.stats.setdefault(name, [kind, 0, 0.0, 0])
+            stat[1] += calls
+            stat[2] += seconds
+            stat[3] += lines
+        return self
+
+    def __getstate__(self):
+        return {"stats": self.stats, "logs": self.logs}
+
+    def __setstate__(self, state):
+        self.stats = state["stats"]
+        self.logs = state["logs"]
+        self._stack = []
+
+    def report(self, top=None):
+        """Returns a table of checks and helpers, slowest first."""
+        total = sum(s[2] for s in self.stats.values() if s[0] == 'total')
+        out = '{} log(s) analyzed in {:.3f}s\n'.format(self.logs, total)
+        for kind, title in (('check', 'Checks'), ('helper', 'Helpers')):
+            ranked = sorted(((n, s) for n, s in self.stats.items() if s[0] == kind),
+                            key=lambda item: -item[1][2])[:top]
+            if not ranked:
+                continue
+            out += '\n{:<30} {:>8} {:>11} {:>9} {:>7} {:>13}\n'.format(title, 'calls', 'total ms', 'ms/call', '%', 'lines')
+            for name, (_, calls, seconds, lines) in ranked:
+                out += '{:<30} {:>8} {:>11.2f} {:>9.3f} {:>6.1f}% {:>13}\n'.format(
+                    name, calls, seconds * 1000, seconds * 1000 / calls,
+                    100 * seconds / total if total else 0, lines)
+        return out
+
+
+@contextlib.contextmanager
+def profiling(profiler):
+    """Makes profiler the active one for the current thread."""
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+
+
+def profiled(func):
+    """Records calls of func with the active profiler, if any."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.measure(name, kind='helper'):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def profiledScan(func):
+    """Like profiled, for lookups whose last argument are the lines they scan.
+
+    The lines searched are taken from the scanned counter of a LogIndex,
+    a plain list counts as scanned whole."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+        lines = args[-1]
+        before = getattr(lines, 'scanned', None)
+        with profiler.measure(name, kind='helper'):
+            result = func(*args, **kwargs)
+            profiler.addLines(len(lines) if before is None else lines.scanned - before)
+            return result
+    return wrapper
@@ -1,32 +1,58 @@
+from .logindex import LogIndex
+from .profiler import profiled, profiledScan
+
+
 # other functions
 # --------------------------------------
 
 
+@profiledScan
 def search(term, lines):
+    if isinstance(lines, LogIndex):
+        return lines.all(term)
     return [s for s in lines if term in s]
 
 
+@profiledScan
 def searchWithIndex(term, lines):
+    if isinstance(lines, LogIndex):
+        return [[lines[i], i] for i in lines.positions(term)]
     return [[s, i] for i, s in enumerate(lines) if term in s]
 
 
-def getSections(lines):
-    sectPos = []
-    for i, s in enumerate(lines):
-        if '------------------------------------------------' in s:
-            sectPos.append(i)
-    return sectPos
+@profiledScan
+def first(term, lines):
+    if isinstance(lines, LogIndex):
+        return lines.first(term)
+    for s in lines:
+        if term in s:
+            return s
+
+
+@profiledScan
+def exists(term, lines):
+    if isinstance(lines, LogIndex):
+        return lines.exists(term)
+    return any(term in s for s in lines)
 
 
-def getNextPos(old, lst):
-    for new in lst:
-        if (new > old):
-            return new
+@profiledScan
+def positions(term, lines):
+    if isinstance(lines, LogIndex):
+        return lines.positions(term)
+    return [i for i, s in enumerate(lines) if term in s]
+
+
+def getPercentage(line):
+    # "... 120 (3,3%)": the value in parentheses, either decimal separator
+    return float(line[line.find("(") + 1: line.find(")")].strip('%').replace(",", "."))
+
+
+@profiled
+def getSections(lines):
+    return positions('------------------------------------------------', lines)
 
 
+@profiled
 def getScenes(lines):
-    scenePos = []
-    for i, s in enumerate(lines):
-        if '- scene' in s:
-            scenePos.append(i)
-    return scenePos
+    return positions('- scene', lines)
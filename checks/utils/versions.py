@@ -0,0 +1,87 @@
+import functools
+import re
+
+
+# Parsing and ordering of OBS version strings, a small stand-in for
+# pkg_resources.parse_version: importing pkg_resources scans every installed
+# distribution, which took longer than analyzing a typical log.
+#
+# Strings that are PEP 440 versions order exactly like they do there.
+# Anything else ('26.1.0-modified', '26.0.0-caffeine') was a LegacyVersion,
+# which sorts before every PEP 440 version and equals no such version; the
+# checks rely on that, so those strings keep that place.
+
+# the version scheme of PEP 440, as packaging.version has it
+VERSION_RE = re.compile(r"""
+    ^\s*
+    v?
+    (?:
+        (?:(?P<epoch>[0-9]+)!)?
+        (?P<release>[0-9]+(?:\.[0-9]+)*)
+        (?P<pre>
+            [-_\.]?
+            (?P<pre_l>(a|b|c|rc|alpha|beta|pre|preview))
+            [-_\.]?
+            (?P<pre_n>[0-9]+)?
+        )?
+        (?P<post>
+            (?:-(?P<post_n1>[0-9]+))
+            |
+            (?:
+                [-_\.]?
+                (?P<post_l>post|rev|r)
+                [-_\.]?
+                (?P<post_n2>[0-9]+)?
+            )
+        )?
+        (?P<dev>
+            [-_\.]?
+            (?P<dev_l>dev)
+            [-_\.]?
+            (?P<dev_n>[0-9]+)?
+        )?
+    )
+    (?:\+(?P<local>[a-z0-9]+(?:[-_\.][a-z0-9]+)*))?
+    \s*$
+    """, re.VERBOSE | re.IGNORECASE)
+
+PRE_LETTERS = {'alpha': 'a', 'beta': 'b', 'c': 'rc', 'pre': 'rc', 'preview': 'rc'}
+
+# segments missing from a version sort before (LOW) or after (HIGH) any
+# that are present; comparing the first item settles it
+LOW = (0,)
+HIGH = (2,)
+
+
+@functools.lru_cache(maxsize=256)
+def parseVersion(text):
+    """Returns a key that orders version strings like pkg_resources.parse_version.
+
+    Keys are tuples and compare with <, <=, == and so on; parse the
+    constants to compare against once, at import."""
+    m = VERSION_RE.match(text)
+    if m is None:
+        return (0, text)
+    release = tuple(int(part) for part in m.group('release').split('.'))
+    while len(release) > 1 and release[-1] == 0:
+        # 1.0 == 1.0.0
+        release = release[:-1]
+    if m.group('pre_l'):
+        pre = (1, PRE_LETTERS.get(m.group('pre_l').lower(), m.group('pre_l').lower()), int(m.group('pre_n') or 0))
+    elif not m.group('post') and m.group('dev_l'):
+        # 1.0.dev0 comes before 1.0a0
+        pre = (-1,)
+    else:
+        pre = HIGH
+    if m.group('post'):
+        post = (1, int(m.group('post_n1') or m.group('post_n2') or 0))
+    else:
+        post = LOW
+    dev = (1, int(m.group('dev_n') or 0)) if m.group('dev_l') else HIGH
+    if m.group('local'):
+        # numeric parts sort after alphanumeric ones
+        local = (1,) + tuple((1, int(part), '') if part.isdigit() else (0, 0, part.lower())
+                             for part in re.split(r'[-_\.]', m.group('local')))
+    else:
+        local = LOW
+    return (1, int(m.group('epoch') or 0), release, pre, post, dev, local)
@@ -1,16 +1,21 @@
 import html
-from pkg_resources import parse_version
 
 from .vars import *
 from .utils.utils import *
 from .core import *
 from .graphics import *
 from .utils.windowsversions import *
+from .utils.versions import parseVersion
 
+# OBS numbers the adapters from 0 since this version
+ADAPTER_0_VERSION = parseVersion('23.2.1')
+# OBS up to this version reports Windows 10 1909 as 1903
+WINDOWS_1903_BUG_VERSION = parseVersion('24.0.3')
 
-def checkGPU(lines):
-    versionString = getOBSVersionString(lines)
-    if parse_version(versionString) < parse_version('23.2.1'):
+
+def checkGPU(facts):
+    lines = facts.lines
+    if facts.obsVersionParsed < ADAPTER_0_VERSION:
         adapters = search('Adapter 1', lines)
         try:
             adapters.append(search('Adapter 2', lines)[0])
@@ -22,12 +27,12 @@ def checkGPU(lines):
             adapters.append(search('Adapter 1', lines)[0])
         except IndexError:
             pass
-    d3dAdapter = search('Loading up D3D11', lines)
-    if (len(d3dAdapter) > 0):
-        if (len(adapters) == 2 and ('Intel' in d3dAdapter[0])):
+    d3dAdapter = first('Loading up D3D11', lines)
+    if (d3dAdapter is not None):
+        if (len(adapters) == 2 and ('Intel' in d3dAdapter)):
             return [LEVEL_CRITICAL, "Wrong GPU",
                     """Your Laptop has two GPUs. OBS is running on the weak integrated Intel GPU. For better performance as well as game capture being available you should run OBS on the dedicated GPU. Check the <a href="https://obsproject.com/wiki/Laptop-Troubleshooting">Laptop Troubleshooting Guide</a>."""]
-        if (len(adapters) == 2 and ('Vega' in d3dAdapter[0])):
+        if (len(adapters) == 2 and ('Vega' in d3dAdapter)):
             return [LEVEL_CRITICAL, "Wrong GPU",
                     """Your Laptop has two GPUs. OBS is running on the weak integrated AMD Vega GPU. For better performance as well as game capture being available you should run OBS on the dedicated GPU. Check the <a href="https://obsproject.com/wiki/Laptop-Troubleshooting">Laptop Troubleshooting Guide</a>."""]
         elif (len(adapters) == 1 and ('Intel' in adapters[0])):
@@ -65,9 +70,9 @@ def getMonitorRefreshes(lines):
     return refreshes
 
 
-def checkRefreshes(lines):
-    refreshes = getMonitorRefreshes(lines)
-    verinfo = getWindowsVersion(lines)
+def checkRefreshes(facts):
+    refreshes = getMonitorRefreshes(facts.lines)
+    verinfo = facts.windowsVersion
 
     # Our log doesn't have any refresh rates, so bail
     if len(refreshes) == 0:
@@ -172,26 +177,26 @@ def checkWasapiSamples(lines):
 
 
 def checkMicrosoftSoftwareGPU(lines):
-    if (len(search('Microsoft Basic Render Driver', lines)) > 0):
+    if (exists('Microsoft Basic Render Driver', lines)):
         return [LEVEL_CRITICAL, "No GPU driver available",
                 "Your GPU is using the Microsoft Basic Render Driver, which is a pure software render. This will cause very high CPU load when used with OBS. Make sure to install proper drivers for your GPU. To use OBS in a virtual machine, you need to enable GPU passthrough."]
 
 
 def checkOpenGLonWindows(lines):
-    opengl = search('Warning: The OpenGL renderer is currently in use.', lines)
-    if (len(opengl) > 0):
+    if (exists('Warning: The OpenGL renderer is currently in use.', lines)):
         return [LEVEL_CRITICAL, "OpenGL Renderer",
                 "The OpenGL renderer should not be used on Windows, as it is not well optimized and can have visual artifacting. Switch back to the Direct3D renderer in Settings > Advanced."]
 
 
 def checkGameDVR(lines):
-    if search('Game DVR Background Recording: On', lines):
+    if exists('Game DVR Background Recording: On', lines):
         return [LEVEL_WARNING, "Windows 10 Game DVR",
                 """To ensure that OBS Studio has the hardware resources it needs for realtime streaming and recording, we recommend disabling the "Game DVR Background Recording" feature via <a href="https://obsproject.com/wiki/How-to-disable-Windows-10-Gaming-Features#game-dvrcaptures">these instructions</a>."""]
 
 
-def checkGameMode(lines):
-    verinfo = getWindowsVersion(lines)
+def checkGameMode(facts):
+    lines = facts.lines
+    verinfo = facts.windowsVersion
 
     if not verinfo or verinfo["version"] != "10.0":
         return
@@ -199,26 +204,24 @@ def checkGameMode(lines):
     if verinfo["version"] == "10.0" and "release" not in verinfo:
         return
 
-    if search("Game Mode: On", lines) and verinfo["release"] < 1809:
+    if exists("Game Mode: On", lines) and verinfo["release"] < 1809:
         return [LEVEL_WARNING, "Windows 10 Game Mode",
                 """In some versions of Windows 10 (prior to version 1809), the "Game Mode" feature interferes with OBS Studio's normal functionality by starving it of CPU and GPU resources. We recommend disabling it via <a href="https://obsproject.com/wiki/How-to-disable-Windows-10-Gaming-Features#game-mode">these instructions</a>."""]
 
     # else
-    if search("Game Mode: Off", lines):
+    if exists("Game Mode: Off", lines):
         return [LEVEL_INFO, "Windows 10 Game Mode",
                 """In Windows 10 versions 1809 and newer, we recommend that "Game Mode" be enabled for maximum gaming performance. Game Mode can be enabled via the Windows 10 "Settings" app, under Gaming > <a href="ms-settings:gaming-gamemode">Game Mode</a>."""]
 
 
 def checkWin10Hags(lines):
-    if search('Hardware GPU Scheduler: On', lines):
+    if exists('Hardware GPU Scheduler: On', lines):
         return [LEVEL_CRITICAL, "Hardware-accelerated GPU Scheduler",
                 """The new Windows 10 Hardware-accelerated GPU scheduling ("HAGS") added with version 2004 is currently known to cause performance and capture issues with OBS, games and overlay tools. It's a new and experimental feature and we recommend disabling it via <a href="ms-settings:display-advancedgraphics">this screen</a> or <a href="https://obsproject.com/wiki/How-to-disable-Windows-10-Hardware-GPU-Scheduler">these instructions</a>."""]
 
 
 def check940(lines):
-    gpu = search('NVIDIA GeForce 940', lines)
-    attempt = search('NVENC encoder', lines)
-    if (len(gpu) > 0) and (len(attempt) > 0):
+    if (exists('NVIDIA GeForce 940', lines) and exists('NVENC encoder', lines)):
         return [LEVEL_CRITICAL, "NVENC Not Supported",
                 """The NVENC Encoder is not supported on the NVIDIA 940 and 940MX. Recording fails to start because of this. Please select "Software (x264)" or "Hardware (QSV)" as encoder instead in Settings > Output."""]
 
@@ -227,11 +230,10 @@ def check940(lines):
 # win 7: 19:39:17.395: Windows Version: 6.1 Build 7601 (revision: 24535; 64-bit)
 # win 10: 15:30:58.866: Windows Version: 10.0 Build 19041 (release: 2004; revision: 450; 64-bit)
 def getWindowsVersionLine(lines):
-    versionLines = search('Windows Version:', lines)
-    if len(versionLines) > 0:
-        return versionLines[0]
+    return first('Windows Version:', lines)
 
 
+@profiled
 def getWindowsVersion(lines):
     versionLine = getWindowsVersionLine(lines)
 
@@ -265,8 +267,8 @@ def getWindowsVersion(lines):
     return
 
 
-def checkWindowsVer(lines):
-    verinfo = getWindowsVersion(lines)
+def checkWindowsVer(facts):
+    verinfo = facts.windowsVersion
     if not verinfo:
         return
 
@@ -274,7 +276,7 @@ def checkWindowsVer(lines):
     if verinfo["version"] == "10.0" and verinfo["release"] == 0:
         msg = "You are running an unknown Windows 10 release (build %d), which means you are probably using an Insider build. Some checks that are applicable only to specific Windows versions will not be performed. Also, because Insider builds are test versions, you may have problems that would not happen with release versions of Windows." % (
             verinfo["build"])
-        return[LEVEL_WARNING, "Windows 10 Version Unknown", msg]
+        return [LEVEL_WARNING, "Windows 10 Version Unknown", msg]
 
     if "EoS" in verinfo and datetime.date.today() > verinfo["EoS"]:
         wv = "%s (EOL)" % (html.escape(verinfo["name"]))
@@ -284,8 +286,7 @@ def checkWindowsVer(lines):
 
     # special case for OBS 24.0.3 and earlier, which report Windows 10/1909
     # as being Windows 10/1903
-    versionString = getOBSVersionString(lines)
-    if parse_version(versionString) <= parse_version("24.0.3"):
+    if facts.obsVersionParsed <= WINDOWS_1903_BUG_VERSION:
         if verinfo["version"] == "10.0" and verinfo["release"] == 1903:
             return [LEVEL_INFO, "Windows 10 1903/1909",
                     "Due to a bug in OBS versions 24.0.3 and earlier, the exact release of Windows 10 you are using cannot be determined. You are using either release 1903, or release 1909. Fortunately, there were no major changes in behavior between Windows 10 release 1903 and Windows 10 release 1909, and instructions given here for release 1903 can also be used for release 1909, and vice versa."]
@@ -304,12 +305,10 @@ def checkWindowsVer(lines):
     return [LEVEL_INFO, wv, msg]
 
 
-def checkAdmin(lines):
-    adminlines = search('Running as administrator', lines)
-    if ((len(adminlines) > 0) and (adminlines[0].split()[-1] == 'false')):
-        renderlag = getRenderLag(lines)
-
-        if renderlag >= 3:
+def checkAdmin(facts):
+    adminline = first('Running as administrator', facts.lines)
+    if ((adminline is not None) and (adminline.split()[-1] == 'false')):
+        if facts.renderLag >= 3:
             return [LEVEL_WARNING, "Not Admin",
                     "OBS is not running as Administrator. Because of this, OBS will not be able to Game Capture certain games, and it will not be able to request a higher GPU priority for itself -- which is the likely cause of the render lag you are currently experincing. Run OBS as Administrator to help alleviate this problem."]
 
@@ -318,10 +317,10 @@ def checkAdmin(lines):
                 "OBS is not running as Administrator. This can lead to OBS not being able to Game Capture certain games. If you are not running into issues, you can ignore this."]
 
 
-def check32bitOn64bit(lines):
-    winVersion = search('Windows Version', lines)
-    obsVersion = getOBSVersionLine(lines)
-    if (len(winVersion) > 0 and '64-bit' in winVersion[0] and '64-bit' not in obsVersion and '64bit' not in obsVersion):
+def check32bitOn64bit(facts):
+    winVersion = first('Windows Version', facts.lines)
+    obsVersion = facts.obsVersionLine
+    if (winVersion is not None and '64-bit' in winVersion and '64-bit' not in obsVersion and '64bit' not in obsVersion):
         # thx to secretply for the bugfix
         return [LEVEL_WARNING, "32-bit OBS on 64-bit Windows",
                 "You are running the 32 bit version of OBS on a 64 bit system. This will reduce performance and greatly increase the risk of crashes due to memory limitations. You should only use the 32 bit version if you have a capture device that lacks 64 bit drivers. Please run OBS using the 64-bit shortcut."]
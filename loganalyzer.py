@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 
 import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
 import textwrap
+import time
 
 from checks.vars import *
+from checks.facts import LogFacts
 from checks.core import *
 from checks.audio import *
 from checks.encoding import *
@@ -13,7 +20,9 @@ from checks.network import *
 from checks.sources import *
 from checks.windows import *
 
+import checks.utils.fetchers as fetchers
 from checks.utils.fetchers import *
+from checks.utils.profiler import Profiler, profiling
 from checks.utils.utils import *
 from checks.utils.windowsversions import *
 
@@ -74,113 +83,249 @@ def getResults(messages):
     return results
 
 
-def doAnalysis(url=None, filename=None):
+# Checks run on every OBS Studio log, in report order. The ones in
+# FACT_CHECKS receive the LogFacts object, all others the LogIndex.
+CHECKS = [
+    checkObsVersion,
+    checkDual,
+    checkAutoconfig,
+    checkCPU,
+    checkAMDdrivers,
+    checkNVIDIAdrivers,
+    checkGPU,
+    checkRefreshes,
+    checkInit,
+    # checkElements,
+    checkNVENC,
+    check940,
+    checkKiller,
+    checkWifi,
+    checkBind,
+    checkWindowsVer,
+    checkMacVer,
+    checkAdmin,
+    check32bitOn64bit,
+    checkAttempt,
+    checkMP4,
+    checkPreset,
+    checkCustom,
+    checkBrowserAccel,
+    checkAudioBuffering,
+    checkDrop,
+    checkRenderLag,
+    checkEncodeError,
+    checkEncoding,
+    checkMulti,
+    checkStreamSettingsX264,
+    checkStreamSettingsNVENC,
+    checkMicrosoftSoftwareGPU,
+    checkWasapiSamples,
+    checkOpenGLonWindows,
+    checkGameDVR,
+    checkGameMode,
+    checkWin10Hags,
+    checkNICSpeed,
+    checkDynamicBitrate,
+    checkStreamDelay,
+]
+FACT_CHECKS = {checkObsVersion, checkGPU, checkRefreshes, checkWindowsVer, checkMacVer, checkAdmin, check32bitOn64bit,
+               checkAttempt, checkAudioBuffering, checkDrop, checkRenderLag, checkEncoding, checkStreamSettingsX264, checkStreamSettingsNVENC, checkGameMode}
+
+
+def noMeasure(name):
+    return contextlib.nullcontext()
+
+
+def analyzeLog(logLines, partial=False, profiler=None):
+    # profiler is a checks.utils.profiler.Profiler or anything else with a
+    # logs counter, a measure(name, lines=0, kind='check') context manager
+    # and addLines(lines), called by lookups within a measurement
+    if profiler is None:
+        return runChecks(logLines, partial, noMeasure)
+    profiler.logs += 1
+    with profiling(profiler), profiler.measure('analyzeLog', kind='total'):
+        return runChecks(logLines, partial, profiler.measure)
+
+
+def runChecks(logLines, partial, measure):
     messages = []
-    success = False
-    logLines = []
+    facts = LogFacts(logLines)
+    with measure('checkClassic'):
+        classic, m = checkClassic(logLines)
+    messages.append(m)
+    if (partial and not classic):
+        # the download was cut off at the Auto-Config Wizard, the rest of
+        # the log has not been read and would give inaccurate results anyway
+        messages.append(checkAutoconfig(logLines))
+    elif (not classic):
+        for check in CHECKS:
+            with measure(check.__name__):
+                messages.append(check(facts if check in FACT_CHECKS else logLines))
+        with measure('checkVideoSettings'):
+            messages.extend(checkVideoSettings(facts))
+        with measure('parseScenes'):
+            m = parseScenes(facts)
+        # TODO Verify .extend() can be used for parseScenes
+        for sublist in m:
+            if sublist is not None:
+                for item in sublist:
+                    messages.append(item)
+    return [i for i in messages if i is not None]
+
+
+NO_LOG = [LEVEL_CRITICAL, "NO LOG", "URL or file doesn't contain a log."]
+
+
+def fetchLog(url=None, filename=None):
+    # returns (description, logLines, partial) or None if there is no log
+    description = None
+    partial = False
+    logLines = None
 
     if url is not None:
-        gist = matchGist(url)
-        haste = matchHaste(url)
-        obs = matchObs(url)
-        pastebin = matchPastebin(url)
-        discord = matchDiscord(url)
-        if (gist):
-            gistObject = getGist(gist.groups()[-1])
-            logLines = getLinesGist(gistObject)
-            messages.append(getDescriptionGist(gistObject))
-            success = True
-        elif (haste):
-            hasteObject = getHaste(haste.groups()[-1])
-            logLines = getLinesHaste(hasteObject)
-            messages.append(getDescription(logLines))
-            success = True
-        elif (obs):
-            obslogObject = getObslog(obs.groups()[-1])
-            logLines = getLinesObslog(obslogObject)
-            messages.append(getDescription(logLines))
-            success = True
-        elif (pastebin):
-            pasteObject = getRawPaste(pastebin.groups()[-1])
-            logLines = getLinesPaste(pasteObject)
-            messages.append(getDescription(logLines))
-            success = True
-        elif (discord):
-            attachment = discord.groups()[-1]
-            if attachment == "message":
-                attachment = discord.groups()[-2]
-            pasteObject = getRawDiscord(attachment)
-            if len(pasteObject) > 0:
-                logLines = getLinesDiscord(pasteObject)
-                messages.append(getDescription(logLines))
-                success = True
+        source = parseUrl(url)
+        if source is not None:
+            description, logLines, partial = fetchSource(source)
+            if not logLines.text:
+                # an empty paste still splits into one empty line
+                return None
 
     elif filename is not None:
-        logLines = getLinesLocal(filename)
-        messages.append(getDescription(logLines))
-        success = True
+        logLines = openLocal(filename)
 
-    if (success):
-        classic, m = checkClassic(logLines)
-        messages.append(m)
-        if (not classic):
-            messages.extend([
-                checkObsVersion(logLines),
-                checkDual(logLines),
-                checkAutoconfig(logLines),
-                checkCPU(logLines),
-                checkAMDdrivers(logLines),
-                checkNVIDIAdrivers(logLines),
-                checkGPU(logLines),
-                checkRefreshes(logLines),
-                checkInit(logLines),
-                # checkElements(logLines),
-                checkNVENC(logLines),
-                check940(logLines),
-                checkKiller(logLines),
-                checkWifi(logLines),
-                checkBind(logLines),
-                checkWindowsVer(logLines),
-                checkMacVer(logLines),
-                checkAdmin(logLines),
-                check32bitOn64bit(logLines),
-                checkAttempt(logLines),
-                checkMP4(logLines),
-                checkPreset(logLines),
-                checkCustom(logLines),
-                checkBrowserAccel(logLines),
-                checkAudioBuffering(logLines),
-                checkDrop(logLines),
-                checkRenderLag(logLines),
-                checkEncodeError(logLines),
-                checkEncoding(logLines),
-                checkMulti(logLines),
-                checkStreamSettingsX264(logLines),
-                checkStreamSettingsNVENC(logLines),
-                checkMicrosoftSoftwareGPU(logLines),
-                checkWasapiSamples(logLines),
-                checkOpenGLonWindows(logLines),
-                checkGameDVR(logLines),
-                checkGameMode(logLines),
-                checkWin10Hags(logLines),
-                checkNICSpeed(logLines),
-                checkDynamicBitrate(logLines),
-                checkStreamDelay(logLines),
-            ])
-            messages.extend(checkVideoSettings(logLines))
-            m = parseScenes(logLines)
-            # TODO Verify .extend() can be used for parseScenes
-            for sublist in m:
-                if sublist is not None:
-                    for item in sublist:
-                        messages.append(item)
+    if logLines is None:
+        return None
+    if description is None:
+        description = getDescription(logLines)
+    return description, logLines, partial
+
+
+def doAnalysis(url=None, filename=None, profiler=None):
+    log = fetchLog(url=url, filename=filename)
+    if log is None:
+        return [NO_LOG]
+    description, logLines, partial = log
+    try:
+        return [description] + analyzeLog(logLines, partial, profiler)
+    finally:
+        logLines.close()
+
+
+# batch mode
+##############################################
+
+SEVERITIES = {LEVEL_INFO: "info", LEVEL_WARNING: "warning", LEVEL_CRITICAL: "critical"}
+
+
+def isUrl(source):
+    return source.startswith('http://') or source.startswith('https://')
+
+
+def listBatch(source):
+    # a directory, a file listing urls/paths (one per line) or a glob pattern
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if os.path.isfile(os.path.join(source, name)))
+    if os.path.isfile(source):
+        with open(source, "r") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return sorted(glob.glob(source, recursive=True))
+
+
+def batchFetch(source):
+    # runs on the I/O pool, local files are read by the analysis worker
+    start = time.perf_counter()
+    log = fetchLog(url=source) if isUrl(source) else None
+    return log, time.perf_counter() - start
+
+
+def batchAnalyze(source, log, profile=False):
+    # runs on the process pool, the profiler travels back to be merged
+    profiler = Profiler() if profile else None
+    start = time.perf_counter()
+    if log is None and not isUrl(source):
+        log = fetchLog(filename=source)
+    read = time.perf_counter() - start
+    if log is None:
+        msgs = [NO_LOG]
     else:
-        messages.append([LEVEL_CRITICAL, "NO LOG",
-                         "URL or file doesn't contain a log."])
-    # print(messages)
-    ret = [i for i in messages if i is not None]
-    # print(ret)
-    return (ret)
+        description, logLines, partial = log
+        try:
+            msgs = [description] + analyzeLog(logLines, partial, profiler)
+        finally:
+            logLines.close()
+    return msgs, read, time.perf_counter() - start - read, profiler
+
+
+def batchRecord(source, msgs=None, timings=None, error=None):
+    record = {"source": source, "description": None, "findings": [], "timings": timings or {}, "error": error}
+    for m in msgs or []:
+        if m[0] == 0:
+            record["description"] = m[2]
+        elif m[0] in SEVERITIES:
+            record["findings"].append({"severity": SEVERITIES[m[0]], "title": m[1], "details": m[2]})
+    return record
+
+
+def startContext():
+    """The multiprocessing context for worker processes.
+
+    Forking a process that runs other threads is unsafe, so workers come
+    from a fork server, or are spawned where there is none."""
+    import multiprocessing
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def runBatch(sources, out, ioWorkers=16, jobs=None, profiler=None):
+    """Fetches on a thread pool, analyzes on a process pool and writes one
+    JSON line per log to out as soon as it is done. The check profiles of
+    all logs are merged into profiler, if given."""
+    # imported here, analyzing a single log does not need the pools
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+    sources = iter(sources)
+    pending = {}
+    jobs = jobs or os.cpu_count() or 1
+    # bounds the number of fetched logs waiting for a worker
+    maxInFlight = ioWorkers + 2 * jobs
+    # the process pool starts its workers while downloads are running
+    with ThreadPoolExecutor(ioWorkers) as io, ProcessPoolExecutor(jobs, mp_context=startContext()) as cpu:
+
+        def refill():
+            while len(pending) < maxInFlight:
+                source = next(sources, None)
+                if source is None:
+                    return
+                pending[io.submit(batchFetch, source)] = ("fetch", source, {})
+
+        refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, source, timings = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    out.write(json.dumps(batchRecord(source, timings=timings, error=repr(e))) + "\n")
+                    out.flush()
+                    continue
+                if stage == "fetch":
+                    log, timings["fetch"] = result
+                    pending[cpu.submit(batchAnalyze, source, log, profiler is not None)] = ("analyze", source, timings)
+                else:
+                    msgs, timings["read"], timings["analysis"], profile = result
+                    if profile is not None:
+                        profiler.merge(profile)
+                    out.write(json.dumps(batchRecord(source, msgs, timings)) + "\n")
+                    out.flush()
+            refill()
+
+
+def configureFetchers(flags):
+    fetchers.CONNECT_TIMEOUT = flags.connect_timeout
+    fetchers.READ_TIMEOUT = flags.read_timeout
+    fetchers.MAX_BODY_BYTES = flags.max_log_size * 1024 * 1024
 
 
 def main():
@@ -191,11 +336,38 @@ def main():
                           default=None, help="url of gist or haste with log")
     loggroup.add_argument("--file", "-f", dest='file',
                           default=None, help="local filenamne with log")
+    loggroup.add_argument("--batch", "-b", dest='batch', default=None,
+                          help="directory, glob pattern or file listing urls/paths; writes one JSON line per log")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        dest='jobs', help="analysis processes in batch mode (default: all cores)")
+    parser.add_argument("--io-workers", type=int, default=16,
+                        dest='io_workers', help="concurrent downloads in batch mode")
+    parser.add_argument("--profile", action='store_true', dest='profile',
+                        help="print time, calls and lines scanned per check to stderr, summed over all logs in batch mode")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT,
+                        dest='connect_timeout', help="seconds to wait for a paste host connection")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT,
+                        dest='read_timeout', help="seconds to wait for data from a paste host")
+    parser.add_argument("--max-log-size", type=int, default=MAX_BODY_BYTES // (1024 * 1024),
+                        dest='max_log_size', help="largest log to download in MiB")
     flags = parser.parse_args()
 
-    msgs = doAnalysis(url=flags.url, filename=flags.file)
-    print(getSummary(msgs))
-    print(getResults(msgs))
+    configureFetchers(flags)
+    profiler = Profiler() if flags.profile else None
+
+    if flags.batch is not None:
+        runBatch(listBatch(flags.batch), sys.stdout, flags.io_workers, flags.jobs, profiler)
+    else:
+        try:
+            msgs = doAnalysis(url=flags.url, filename=flags.file, profiler=profiler)
+        except OSError as e:
+            if flags.file is None:
+                raise
+            sys.exit("cannot read {}: {}".format(flags.file, e.strerror))
+        print(getSummary(msgs))
+        print(getResults(msgs))
+    if profiler is not None:
+        sys.stderr.write(profiler.report())
 
 
 if __name__ == "__main__":
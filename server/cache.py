@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class CacheEntry:
+    """Analysis result for one log plus its serialized responses."""
+
+    def __init__(self, msgs, expires):
+        self.msgs = msgs
+        self.expires = expires
+        self.rendered = {}
+
+    def render(self, key, func):
+        """Returns the response body stored under key, producing it with func() once."""
+        body = self.rendered.get(key)
+        if body is None:
+            body = self.rendered[key] = func()
+        return body
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results with a TTL.
+
+    Concurrent misses for the same key are coalesced: the first caller runs
+    the loader, every other caller waits for its result instead of fetching
+    and analyzing the same log again.
+    """
+
+    def __init__(self, maxEntries=256, ttl=600):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits,
+                "misses": self.misses, "coalesced": self.coalesced}
+
+    def _claim(self, key):
+        # returns (entry, None) on a hit, otherwise (None, future) and
+        # whether the caller owns the future and has to load the entry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry, None, False
+                del self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+            return None, future, owner
+
+    def _fail(self, key, future, e):
+        with self._lock:
+            del self._inflight[key]
+        future.set_exception(e)
+
+    def _fill(self, key, future, msgs):
+        entry = CacheEntry(msgs, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(entry)
+        return entry
+
+    def get(self, key, loader):
+        """Returns the CacheEntry for key, loading it with loader() on a miss.
+
+        The second return value tells how the entry was obtained: 'hit',
+        'miss' or 'coalesced'."""
+        entry, future, owner = self._claim(key)
+        if entry is not None:
+            return entry, 'hit'
+        if not owner:
+            return future.result(), 'coalesced'
+        try:
+            msgs = loader()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        return self._fill(key, future, msgs), 'miss'
+
+    async def getAsync(self, key, loader):
+        """Same as get(), for a coroutine function loader."""
+        entry, future, owner = self._claim(key)
+        if entry is not None:
+            return entry, 'hit'
+        if not owner:
+            return await asyncio.wrap_future(future), 'coalesced'
+        # the load runs as its own task, so a disconnecting client does not
+        # cancel it for everyone waiting on the same key
+        task = asyncio.ensure_future(self._load(key, future, loader))
+        return await asyncio.shield(task), 'miss'
+
+    async def _load(self, key, future, loader):
+        try:
+            msgs = await loader()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        return self._fill(key, future, msgs)
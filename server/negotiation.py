@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Content negotiation and validators for responses: compression picked from
+# Accept-Encoding, strong ETags and If-None-Match.
+
+# bodies smaller than this are sent as they are, compressing them does not pay
+MIN_COMPRESS_BYTES = 1024
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body)
+    if encoding == 'gzip':
+        # no timestamp, the same body always compresses to the same bytes
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+def supportedEncodings():
+    """Encodings we can send, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parseAcceptEncoding(header):
+    """Returns {coding: q} of an Accept-Encoding header."""
+    res = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        res[coding] = q
+    return res
+
+
+def negotiateEncoding(header, size):
+    """Picks the content coding for a body of size bytes, 'identity' for none."""
+    if not header or size < MIN_COMPRESS_BYTES:
+        return 'identity'
+    accepted = parseAcceptEncoding(header)
+    best = 'identity'
+    bestQ = 0.0
+    for coding in supportedEncodings():
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > bestQ:
+            best, bestQ = coding, q
+    return best
+
+
+def makeETag(*parts):
+    """Strong entity tag over the JSON form of parts."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+    return digest[:32]
+
+
+def quoteETag(tag, encoding):
+    # every content coding is a different representation with its own tag
+    if encoding != 'identity':
+        tag += '-' + encoding
+    return '"{}"'.format(tag)
+
+
+def etagMatches(header, etag):
+    """Whether an If-None-Match header matches the quoted etag."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            # weak comparison, as If-None-Match calls for
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,101 @@
+import html
+import string
+
+
+# HTML pages of the web server, rendered from the str.format templates in
+# templates/. The templates are split into their literal parts once; a page
+# is then written into one list of strings and joined a single time.
+
+NO_LOG = "Please analyze a log first."
+
+# severity of a finding -> bootstrap class and label, in page order
+SEVERITIES = ((3, 'danger', 'Critical'),
+              (2, 'warning', 'Warning'),
+              (1, 'info', 'Info'))
+
+# shown in a summary card that has no findings
+EMPTY_SUMMARY = {3: "No critical issues.", 2: "No warnings.", 1: "-"}
+
+
+class Template:
+    """A str.format template compiled into literals and the fields between them."""
+
+    def __init__(self, text):
+        self.literals = []
+        self.fields = []
+        pending = ''
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError('template field {!r} has a format spec or conversion'.format(field))
+            # an escaped brace ends a literal without a field after it
+            pending += literal
+            if field is not None:
+                self.literals.append(pending)
+                self.fields.append(field)
+                pending = ''
+        self.literals.append(pending)
+
+    def write(self, out, values):
+        """Appends the template to the list out; a value may be a str or a list of str."""
+        for literal, field in zip(self.literals, self.fields):
+            out.append(literal)
+            value = values[field]
+            if isinstance(value, str):
+                out.append(value)
+            else:
+                out.extend(value)
+        out.append(self.literals[-1])
+
+
+def bucketFindings(msgs):
+    """Splits the messages of an analysis into the description and the findings per severity, in one pass."""
+    description = ""
+    findings = {severity: [] for severity, _, _ in SEVERITIES}
+    for severity, title, text in msgs:
+        if severity == 0:
+            description = text
+        elif severity in findings:
+            findings[severity].append((title, text))
+    return description, findings
+
+
+class PageRenderer:
+    """Renders the result page and its details from the index and detail templates.
+
+    The page without an analysis never changes, it is rendered and encoded
+    once in advance. Titles and details of findings are HTML already, the
+    checks escape what they take from a log.
+    """
+
+    def __init__(self, page, detail):
+        self.pageTemplate = Template(page)
+        self.detailTemplate = Template(detail)
+        self.empty = self._render({"ph": "",
+                                   "description": "no log",
+                                   "summary_critical": NO_LOG,
+                                   "summary_warning": NO_LOG,
+                                   "summary_info": NO_LOG,
+                                   "details": """<p class="text-warning">""" + NO_LOG + """</p>"""})
+
+    def _render(self, values):
+        out = []
+        self.pageTemplate.write(out, values)
+        return ''.join(out).encode()
+
+    def page(self, url, msgs):
+        """Returns the encoded page with the results of an analysis of url."""
+        description, findings = bucketFindings(msgs)
+        url = html.escape(url)
+        values = {"ph": url,
+                  "description": ['<a href="', url, '">', html.escape(description), '</a>']}
+        details = []
+        for severity, sev, label in SEVERITIES:
+            summary = []
+            for title, text in findings[severity]:
+                summary += ['<p><a href="#', title, '"><button type="button" class="btn btn-', sev, '">',
+                            title, '</button></a></p>\n']
+                self.detailTemplate.write(details, {"anchor": title, "sev": sev, "severity": label,
+                                                    "title": title, "text": text})
+            values["summary_" + label.lower()] = summary or EMPTY_SUMMARY[severity]
+        values["details"] = details
+        return self._render(values)
@@ -0,0 +1,111 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+
+# Admission control in front of the analysis executor. A fixed number of
+# jobs run at once; the rest wait in a bounded queue, split into lanes of
+# descending priority and, within a lane, served round-robin per client.
+
+# lane names, highest priority first
+LANES = ('store', 'interactive', 'bulk')
+
+
+class Overloaded(Exception):
+    """The queue is full; retryAfter is a hint in whole seconds."""
+
+    def __init__(self, retryAfter):
+        super().__init__('analysis queue is full, retry after {}s'.format(retryAfter))
+        self.retryAfter = retryAfter
+
+
+class Scheduler:
+    """Runs jobs on at most slots at once, queueing at most maxQueue more.
+
+    Waiting jobs are granted a slot from the highest priority lane that has
+    any. Within a lane every client has its own queue and the clients take
+    turns, so one client sending many requests only delays itself. A job
+    arriving at a full queue is rejected right away with Overloaded.
+
+    All methods must be called from the event loop thread.
+    """
+
+    def __init__(self, slots, maxQueue, lanes=LANES, onWait=None):
+        self.slots = slots
+        self.maxQueue = maxQueue
+        self.onWait = onWait
+        self.running = 0
+        self.queued = 0
+        self._lanes = OrderedDict((lane, OrderedDict()) for lane in lanes)  # lane -> client -> waiters
+        self._jobSeconds = 1.0  # moving average, for the retry hint
+
+    def full(self):
+        return self.queued >= self.maxQueue
+
+    def retryAfter(self):
+        """Rough number of seconds until a job arriving now would get a slot."""
+        return max(1, math.ceil(self._jobSeconds * (self.queued + 1) / self.slots))
+
+    def check(self):
+        """Raises Overloaded if a job would be rejected now, e.g. before a download."""
+        if self.full():
+            raise Overloaded(self.retryAfter())
+
+    def queuedIn(self, lane):
+        return sum(len(waiters) for waiters in self._lanes[lane].values())
+
+    async def run(self, lane, client, job):
+        """Awaits job(), a coroutine function, once it is granted a slot."""
+        start = time.monotonic()
+        if self.running < self.slots and not self.queued:
+            self.running += 1
+        else:
+            self.check()
+            waiter = asyncio.get_running_loop().create_future()
+            clients = self._lanes[lane]
+            clients.setdefault(client, deque()).append(waiter)
+            self.queued += 1
+            try:
+                # the slot is taken over for us before we are woken up
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # granted a slot just before the cancellation
+                    self._release()
+                else:
+                    waiters = clients.get(client)
+                    if waiters is not None and waiter in waiters:
+                        waiters.remove(waiter)
+                        if not waiters:
+                            del clients[client]
+                        self.queued -= 1
+                raise
+        if self.onWait is not None:
+            self.onWait(lane, time.monotonic() - start)
+        begin = time.monotonic()
+        try:
+            return await job()
+        finally:
+            self._jobSeconds = 0.8 * self._jobSeconds + 0.2 * (time.monotonic() - begin)
+            self._release()
+
+    def _release(self):
+        self.running -= 1
+        for clients in self._lanes.values():
+            while clients:
+                client, waiters = next(iter(clients.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    # the client's next job waits for the other clients
+                    clients.move_to_end(client)
+                else:
+                    del clients[client]
+                self.queued -= 1
+                if waiter.cancelled():
+                    # its task is still to see the cancellation, the slot
+                    # goes to the next one
+                    continue
+                self.running += 1
+                waiter.set_result(None)
+                return
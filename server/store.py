@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import checks
+from checks.vars import CURRENT_VERSION
+
+
+def getRulesetVersion():
+    """Hash of the checks package sources and CURRENT_VERSION.
+
+    Any change to a check, or a new OBS release, yields a new version, which
+    invalidates every stored analysis result."""
+    digest = hashlib.sha256(CURRENT_VERSION.encode())
+    root = os.path.dirname(checks.__file__)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith('.py'):
+                path = os.path.join(dirpath, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+RULESET_VERSION = getRulesetVersion()
+
+
+def contentHash(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+class LogStore:
+    """Content-addressed on-disk store for fetched logs and analysis results.
+
+    Layout below the root directory:
+
+        logs/<hash>.gz                     raw log text
+        results/<hash>.<ruleset>[.partial].json.gz
+                                           findings of one analysis
+        keys/<sha1 of paste key>.json      paste key -> content hash
+
+    Identical content from different paste hosts shares one log and one
+    result. Results carry the ruleset version in their name, results of an
+    older ruleset are dropped when the store is opened. The total size is
+    capped, least recently used files are evicted first.
+    """
+
+    def __init__(self, root, maxBytes=1024 * 1024 * 1024):
+        self.root = root
+        self.maxBytes = maxBytes
+        self._lock = threading.Lock()
+        self._size = 0
+        for sub in ('logs', 'results', 'keys'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        for path, st in self._files():
+            if path.endswith('.json.gz') and '.{}.'.format(RULESET_VERSION) not in os.path.basename(path):
+                os.remove(path)
+            else:
+                self._size += st.st_size
+        logging.info('Log store at {} holds {} bytes, ruleset {}'.format(root, self._size, RULESET_VERSION))
+
+    def _files(self):
+        for sub in ('logs', 'results', 'keys'):
+            with os.scandir(os.path.join(self.root, sub)) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        yield entry.path, entry.stat()
+
+    def _logPath(self, digest):
+        return os.path.join(self.root, 'logs', digest + '.gz')
+
+    def _resultPath(self, digest, partial):
+        name = '{}.{}{}.json.gz'.format(digest, RULESET_VERSION, '.partial' if partial else '')
+        return os.path.join(self.root, 'results', name)
+
+    def _keyPath(self, key):
+        return os.path.join(self.root, 'keys', hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def _write(self, path, data):
+        tmp = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            try:
+                self._size -= os.stat(path).st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            self._size += len(data)
+            if self._size > self.maxBytes:
+                self._evict()
+
+    def _evict(self):
+        # called with the lock held, shrinks the store to 90% of its cap
+        target = self.maxBytes * 9 // 10
+        for path, st in sorted(self._files(), key=lambda f: f[1].st_mtime):
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= st.st_size
+
+    def size(self):
+        return self._size
+
+    def getKey(self, key):
+        """Returns {"hash", "description", "partial"} for a paste key."""
+        data = self._read(self._keyPath(key))
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def putKey(self, key, digest, description, partial):
+        record = {"hash": digest, "description": description, "partial": partial}
+        self._write(self._keyPath(key), json.dumps(record).encode())
+        return record
+
+    def getLog(self, digest):
+        data = self._read(self._logPath(digest))
+        if data is None:
+            return None
+        return gzip.decompress(data).decode('utf-8', 'surrogateescape')
+
+    def putLog(self, text):
+        """Stores the raw text of a log and returns its content hash."""
+        digest = contentHash(text)
+        path = self._logPath(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._write(path, gzip.compress(text.encode('utf-8', 'surrogateescape')))
+        return digest
+
+    def getResult(self, digest, partial=False):
+        data = self._read(self._resultPath(digest, partial))
+        if data is None:
+            return None
+        return json.loads(gzip.decompress(data))["msgs"]
+
+    def putResult(self, digest, partial, msgs):
+        data = gzip.compress(json.dumps({"ruleset": RULESET_VERSION, "time": time.time(), "msgs": msgs}).encode())
+        self._write(self._resultPath(digest, partial), data)
@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import loganalyzer
+from checks.utils.logindex import LogBuffer, SharedLogBuffer
+from checks.utils.profiler import Profiler
+
+
+# Analyses of the web server can run on a pool of worker processes instead
+# of its thread pool, so that large logs do not contend for the GIL.
+
+# analyzed once by every new worker, so the first real job does not pay for
+# imports, compiled patterns and other lazily built state
+WARMUP_LOG = """21:17:44.672: CPU Name: Intel(R) Core(TM) i7-8700K CPU @ 3.70GHz
+21:17:44.672: Windows Version: 10.0 Build 19041 (release: 2004; revision: 450; 64-bit)
+21:17:44.795: OBS 26.1.0 (64-bit, windows)
+21:17:45.520: ---------------------------------
+21:17:46.118: Loaded scenes:
+21:17:46.118: - scene 'Scene':
+21:17:46.118:     - source: 'Game Capture' (game_capture)
+21:17:46.118: ------------------------------------------------"""
+
+
+def warmUp():
+    loganalyzer.analyzeLog(LogBuffer(WARMUP_LOG))
+
+
+def analyzeProfiled(logLines, partial):
+    """analyzeLog with a fresh profiler; returns (msgs, profiler)."""
+    profiler = Profiler()
+    msgs = loganalyzer.analyzeLog(logLines, partial, profiler)
+    return msgs, profiler
+
+
+def analyzeShared(filename, partial):
+    """analyzeProfiled on a log handed over with SharedLogBuffer.write()."""
+    logLines = SharedLogBuffer(filename)
+    try:
+        return analyzeProfiled(logLines, partial)
+    finally:
+        logLines.close()
+
+
+class WorkerPool:
+    """Pool of worker processes that is replaced after a number of jobs.
+
+    Memory a worker accumulates over many analyses (fragmentation, caches)
+    is only given back when the process exits. After maxJobs jobs per
+    worker a fresh pool takes over new jobs while the old one finishes the
+    jobs it already has and exits.
+
+    A worker that dies (killed for its memory, crashed) breaks its whole
+    pool. The jobs on that pool fail, new ones go to a fresh pool.
+    """
+
+    def __init__(self, workers, maxJobs=None):
+        self.workers = workers
+        self.maxJobs = maxJobs
+        self.jobs = 0
+        self.recycled = 0
+        self.restarted = 0
+        self._lock = threading.Lock()
+        # pools are started again while the server runs, from a process
+        # with many threads
+        self._context = loganalyzer.startContext()
+        self._executor = self._start()
+
+    def _start(self):
+        executor = ProcessPoolExecutor(self.workers, mp_context=self._context, initializer=warmUp)
+        # the processes start with the first job; start them now, before
+        # anyone waits for them
+        executor.submit(int)
+        return executor
+
+    def _replace(self):
+        old = self._executor
+        self._executor = self._start()
+        self.jobs = 0
+        # shutdown(wait=False) closes the pipes of the old pool while its
+        # manager thread still uses them (Python 3.8), its workers are then
+        # left behind; wait for it on a thread of its own instead
+        threading.Thread(target=old.shutdown, name='retire-worker-pool').start()
+
+    def submit(self, func, *args):
+        with self._lock:
+            return self._submit(func, *args)[1]
+
+    def _submit(self, func, *args):
+        if self.maxJobs and self.jobs >= self.maxJobs * self.workers:
+            logging.info('Recycling {} worker processes'.format(self.workers))
+            self._replace()
+            self.recycled += 1
+        self.jobs += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._restart(self._executor)
+            future = self._executor.submit(func, *args)
+        return self._executor, future
+
+    def _restart(self, executor):
+        # called with the lock held, for the pool a job found broken
+        if self._executor is executor:
+            logging.warning('A worker process died, starting {} new ones'.format(self.workers))
+            self._replace()
+            self.restarted += 1
+
+    def run(self, func, *args):
+        """submit() and wait for the result."""
+        with self._lock:
+            executor, future = self._submit(func, *args)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            with self._lock:
+                self._restart(executor)
+            raise
+
+    def analyze(self, logLines, partial):
+        """analyzeProfiled on a worker; waits for it and returns (msgs, profiler).
+
+        The text of a LogBuffer is handed over in shared memory instead of
+        being pickled, the worker analyzes it in place."""
+        if not isinstance(logLines, LogBuffer) or not logLines.text:
+            return self.run(analyzeProfiled, logLines, partial)
+        filename = SharedLogBuffer.write(logLines.text)
+        try:
+            return self.run(analyzeShared, filename, partial)
+        finally:
+            os.unlink(filename)
+
+    def shutdown(self):
+        with self._lock:
+            self._executor.shutdown()
@@ -4,13 +4,57 @@ import logging
 import argparse
 from concurrent import futures
 import asyncio
+import aiohttp
 from aiohttp import web
 import json
+import os
+import signal
+import time
 import loganalyzer as analyze
+import checks.utils.asyncfetchers as fetchers
+from server.cache import CacheEntry, ResultCache
+from server.metrics import CONTENT_TYPE, SIZE_BUCKETS, Registry
+from server.render import PageRenderer
+from server.scheduler import Overloaded, Scheduler
+from server.negotiation import etagMatches, compress, makeETag, negotiateEncoding, quoteETag
+from server.store import RULESET_VERSION, LogStore
+from server.workers import WorkerPool, analyzeProfiled
+
+# most items in one request to /batch, and how many of them are fetched
+# and analyzed at once
+BATCH_MAX_ITEMS = 100
+BATCH_CONCURRENCY = 8
+
+# addresses of reverse proxies in front of the server; requests from them
+# are put down to the client named in their forwarded-for header
+trustedProxies = frozenset()
+forwardedHeader = 'X-Forwarded-For'
 
 loop = asyncio.get_event_loop()
 threadPool = futures.ThreadPoolExecutor(thread_name_prefix='loganalyzer: worker thread')
 app = web.Application()
+resultCache = ResultCache()
+logStore = None
+workerPool = None
+scheduler = Scheduler(os.cpu_count() or 1, 64, onWait=lambda lane, seconds: queueSeconds.observe(seconds, lane=lane))
+
+metrics = Registry()
+requestSeconds = metrics.histogram('loganalyzer_request_duration_seconds', 'Time to answer a request.', ['route', 'status'])
+phaseSeconds = metrics.histogram('loganalyzer_phase_duration_seconds', 'Time spent per phase of an analysis request.', ['phase'])
+responseBytes = metrics.histogram('loganalyzer_response_size_bytes', 'Size of response bodies.', ['route'], SIZE_BUCKETS)
+fetchSeconds = metrics.histogram('loganalyzer_fetch_duration_seconds', 'Time to download a log, per paste host.', ['host'])
+fetchErrors = metrics.counter('loganalyzer_fetch_errors_total', 'Failed log downloads, per paste host.', ['host', 'error'])
+cacheRequests = metrics.counter('loganalyzer_result_cache_requests_total', 'Result cache lookups by outcome.', ['status'])
+cacheEntries = metrics.gauge('loganalyzer_result_cache_entries', 'Analysis results held in memory.', func=lambda: len(resultCache))
+storeBytes = metrics.gauge('loganalyzer_store_size_bytes', 'Size of the on-disk log store.', func=lambda: logStore.size() if logStore is not None else 0)
+poolQueued = metrics.gauge('loganalyzer_pool_queued_jobs', 'Jobs waiting for a worker thread.')
+poolActive = metrics.gauge('loganalyzer_pool_active_workers', 'Worker threads currently running a job.')
+checkSeconds = metrics.counter('loganalyzer_check_seconds_total', 'Cumulative time spent in each check.', ['check'])
+checkCalls = metrics.counter('loganalyzer_check_calls_total', 'Number of times each check ran.', ['check'])
+queueSeconds = metrics.histogram('loganalyzer_queue_wait_seconds', 'Time a job waited for an analysis slot, per lane.', ['lane'])
+rejectedRequests = metrics.counter('loganalyzer_rejected_requests_total', 'Requests turned away with 503 because the queue was full.', ['lane'])
+queuedJobs = metrics.gauge('loganalyzer_queued_jobs', 'Jobs waiting for an analysis slot.', func=lambda: scheduler.queued)
+runningJobs = metrics.gauge('loganalyzer_running_jobs', 'Jobs holding an analysis slot.', func=lambda: scheduler.running)
 
 with open("templates/index.html", "r") as f:  # Grab main HTML page
     htmlTemplate = f.read()
@@ -18,106 +62,123 @@ with open("templates/index.html", "r") as f:  # Grab main HTML page
 with open("templates/detail.html", "r") as f:  # Grab details page
     htmlDetail = f.read()
 
+renderer = PageRenderer(htmlTemplate, htmlDetail)
 
-def checkUrl(url):
-    """Check if the incoming URL can be analyzed"""
-    return any((analyze.matchGist(url), analyze.matchHaste(url), analyze.matchObs(url), analyze.matchPastebin(url), analyze.matchDiscord(url)))
+# responses without an analysis, they never expire
+emptyResponses = CacheEntry([], float('inf'))
 
 
-def getSummaryHTML(messages):
-    """Helper func. Generates the summary secion of the HTML page."""
-    critical = ""
-    warning = ""
-    info = ""
-    for i in messages:
-        if (i[0] == 3):
-            critical = critical + """<p><a href="#""" + \
-                i[1] + """"><button type="button" class="btn btn-danger">""" + \
-                i[1] + "</button></a></p>\n"
-        elif (i[0] == 2):
-            warning = warning + """<p><a href="#""" + \
-                i[1] + """"><button type="button" class="btn btn-warning">""" + \
-                i[1] + "</button></a></p>\n"
-        elif (i[0] == 1):
-            info = info + """<p><a href="#""" + \
-                i[1] + """"><button type="button" class="btn btn-info">""" + \
-                i[1] + "</button></a></p>\n"
-    if (len(critical) == 0):
-        critical = "No critical issues."
-    if (len(warning) == 0):
-        warning = "No warnings."
-    if (len(info) == 0):
-        info = "-"
-    return critical, warning, info
-
-
-def getDetailsHTML(messages):
-    """Helper func. Generates detailes section of the HTML page."""
-    res = ""
-    for i in messages:
-        if (i[0] == 3):
-            res = res + htmlDetail.format(anchor=i[1],
-                                          sev='danger',
-                                          severity='Critical',
-                                          title=i[1],
-                                          text=i[2])
-    for i in messages:
-        if (i[0] == 2):
-            res = res + htmlDetail.format(anchor=i[1],
-                                          sev='warning',
-                                          severity='Warning',
-                                          title=i[1],
-                                          text=i[2])
-    for i in messages:
-        if (i[0] == 1):
-            res = res + htmlDetail.format(anchor=i[1],
-                                          sev='info',
-                                          severity='Info',
-                                          title=i[1],
-                                          text=i[2])
-    return res
-
-
-def getDescr(messages):
-    """Helper func. Gets the desciption created by the analysis."""
-    res = ""
-    for i in messages:
-        if (i[0] == 0):
-            res = i[2]
-    return res
-
-
-def genFullHtmlResponse(url):
-    """Runs an analysis and returns a full HTML page with the response."""
-    msgs = analyze.doAnalysis(url=url)
-    crit, warn, info = getSummaryHTML(msgs)
-    details = getDetailsHTML(msgs)
-    response = htmlTemplate.format(ph=url,
-                                   description="""<a href="{}">{}</a>""".format(
-                                       url, getDescr(msgs)),
-                                   summary_critical=crit,
-                                   summary_warning=warn,
-                                   summary_info=info,
-                                   details=details)
-    return response
+async def runInPool(func, *args):
+    """Runs func(*args) in the thread pool, keeping the pool gauges current."""
+    poolQueued.inc()
+
+    def run():
+        poolQueued.dec()
+        poolActive.inc()
+        try:
+            return func(*args)
+        finally:
+            poolActive.dec()
+    return await loop.run_in_executor(None, run)
+
+
+def runAnalysis(logLines, partial):
+    """analyzeLog, adding the time spent in every check to the metrics.
+
+    Runs on a worker process when the server was started with --workers,
+    the calling thread waits for it."""
+    with phaseSeconds.time(phase='analysis'):
+        if workerPool is None:
+            msgs, profiler = analyzeProfiled(logLines, partial)
+        else:
+            msgs, profiler = workerPool.analyze(logLines, partial)
+    for name, (kind, calls, seconds, lines) in profiler.stats.items():
+        if kind == 'check':
+            checkSeconds.inc(seconds, check=name)
+            checkCalls.inc(calls, check=name)
+    return msgs
+
+
+def loadStored(key):
+    """Returns the findings for a paste key from the on-disk store, or None."""
+    known = logStore.getKey(key)
+    if known is None:
+        return None
+    msgs = logStore.getResult(known["hash"], known["partial"])
+    if msgs is not None:
+        logging.info('Log store hit for {}'.format(key))
+        return [known["description"]] + msgs
+    text = logStore.getLog(known["hash"])
+    if text is not None:
+        # analyzed by an older ruleset, the log itself is still around
+        logging.info('Re-analyzing stored log for {}'.format(key))
+        msgs = runAnalysis(analyze.LogBuffer(text), known["partial"])
+        logStore.putResult(known["hash"], known["partial"], msgs)
+        return [known["description"]] + msgs
+    return None
+
 
+def analyzeFetched(key, log):
+    """Analyzes a fetched log, going through the on-disk store if enabled.
 
-def genEmptyHtmlResponse():
-    """Generates a full HTML page with no analysis."""
-    no_log = "Please analyze a log first."
-    response_body = htmlTemplate.format(ph="",
-                                        description="no log",
-                                        summary_critical=no_log,
-                                        summary_warning=no_log,
-                                        summary_info=no_log,
-                                        details="""<p class="text-warning">""" + no_log + """</p>""")
-    return response_body
+    key is None for an uploaded log, which has no paste key."""
+    description, logLines, partial = log
+    if logStore is None:
+        return [description] + runAnalysis(logLines, partial)
+    # fetched logs are LogBuffers, their text is the log as downloaded
+    digest = logStore.putLog(logLines.text)
+    if key is not None:
+        logStore.putKey(key, digest, description, partial)
+    msgs = logStore.getResult(digest, partial)
+    if msgs is None:
+        msgs = runAnalysis(logLines, partial)
+        logStore.putResult(digest, partial, msgs)
+    else:
+        logging.info('Log store content hit for {}'.format(key))
+    return [description] + msgs
+
+
+async def analyzeUrl(source, lane, client):
+    """Fetches the log of a LogSource on the event loop and analyzes it in the thread pool.
+
+    Work in the pool goes through the scheduler: store lookups in their own
+    lane, analyses in the given one. Raises Overloaded when the queue is
+    full, checked before the download too, so no log is fetched only to
+    wait."""
+    key = source.key
+    if logStore is not None:
+        async def lookup():
+            with phaseSeconds.time(phase='store'):
+                return await runInPool(loadStored, key)
+        msgs = await scheduler.run('store', client, lookup)
+        if msgs is not None:
+            return msgs
+    scheduler.check()
+    host = source.provider.name
+    start = time.perf_counter()
+    try:
+        log = await fetchers.fetchLog(source)
+    except Exception as e:
+        fetchErrors.inc(host=host, error=type(e).__name__)
+        raise
+    finally:
+        fetchSeconds.observe(time.perf_counter() - start, host=host)
+        phaseSeconds.observe(time.perf_counter() - start, phase='fetch')
+    if log is None:
+        fetchErrors.inc(host=host, error='NoLog')
+        return [analyze.NO_LOG]
+    return await scheduler.run(lane, client, lambda: runInPool(analyzeFetched, key, log))
+
+
+async def analyzeUploaded(log, lane, client):
+    """Analyzes a log the client sent itself, a (description, logLines, partial) tuple or None."""
+    if log is None:
+        return [analyze.NO_LOG]
+    return await scheduler.run(lane, client, lambda: runInPool(analyzeFetched, None, log))
 
 
-def genJsonResponse(url, detailed):
-    """Runs an analysis and returns the results as JSON."""
-    msgs = []
-    msgs = analyze.doAnalysis(url=url)
+def genJsonResponse(msgs, detailed):
+    """Returns the results of an analysis as JSON."""
     critical = []
     warning = []
     info = []
@@ -134,45 +195,240 @@ def genJsonResponse(url, detailed):
     return {"critical": critical, "warning": warning, "info": info}
 
 
-def sync_request_handler(request):
-    """Non-async request handler processed within the thread pool. Do not share global resources without a Lock."""
+def sendBody(request, entry, key, render, contentType, cacheable=True):
+    """Responds with the body entry renders for key, honoring Accept-Encoding and If-None-Match.
+
+    Rendered bodies, their compressed forms and ETags are kept in the
+    entry, so a repeated request costs neither rendering nor compression.
+    The ETag is derived from the findings, which follow from the log
+    content, and the ruleset version."""
+    with phaseSeconds.time(phase='render'):
+        body = entry.render(key, render)
+        encoding = negotiateEncoding(request.headers.get('Accept-Encoding'), len(body))
+        etag = quoteETag(entry.render(key + ('etag',), lambda: makeETag(RULESET_VERSION, entry.msgs, key)), encoding)
+        headers = {'ETag': etag, 'Vary': 'Accept-Encoding',
+                   'Cache-Control': 'public, max-age={}'.format(resultCache.ttl) if cacheable else 'no-store'}
+        if etagMatches(request.headers.get('If-None-Match'), etag):
+            return web.Response(status=304, headers=headers)
+        if encoding != 'identity':
+            body = entry.render(key + (encoding,), lambda: compress(body, encoding))
+            headers['Content-Encoding'] = encoding
+    return web.Response(body=body, content_type=contentType, charset='utf-8' if contentType == 'text/html' else None, headers=headers)
+
+
+def sendResults(request, entry, status, format, detailed, url):
+    """Responds with the findings in entry as JSON or as the HTML page."""
+    if format == 'json':
+        logging.info('Returning JSON response for url: {}'.format(url))
+        return sendBody(request, entry, ('json', detailed),
+                        lambda: json.dumps(genJsonResponse(entry.msgs, detailed)).encode(),
+                        'application/json', status not in ('error', 'upload'))
+    logging.info('Returning HTML response for url: {}'.format(url))
+    return sendBody(request, entry, ('html', url), lambda: renderer.page(url, entry.msgs),
+                    'text/html', status not in ('error', 'upload'))
+
+
+def sendBusy(e, lane):
+    rejectedRequests.inc(lane=lane)
+    return web.Response(status=503, text='The analyzer is busy, please try again shortly.',
+                        headers={'Retry-After': str(e.retryAfter), 'Cache-Control': 'no-store'})
+
+
+def sendEmpty(request, format):
+    if format == 'json':
+        logging.info('Returning empty JSON response.')
+        return sendBody(request, emptyResponses, ('json',), lambda: b'{}', 'application/json')
+    logging.info('Returning default HTML response.')
+    return sendBody(request, emptyResponses, ('html',), lambda: renderer.empty, 'text/html')
+
+
+def clientOf(request):
+    """The address of the client of a request, which takes turns in the scheduler with all others.
+
+    Behind a trusted proxy every request comes from the proxy; the client
+    is then the last address in the forwarded-for header that is not
+    another trusted proxy. Any address before it could be made up."""
+    if request.remote not in trustedProxies:
+        return request.remote
+    addresses = [a.strip() for value in request.headers.getall(forwardedHeader, ()) for a in value.split(',')]
+    for address in reversed(addresses):
+        if address and address not in trustedProxies:
+            return address
+    return request.remote
+
+
+async def request_handler(request):
+    """Async request handler. Logs are fetched on the event loop, the analysis itself runs in the thread pool."""
     query = request.query  # Get HTTP query string as a MultiDict
     format = 'html'
     if 'format' in query:  # Check for requested response format
         format = query['format'].lower()
+    client = clientOf(request)
 
-    logging.info('New HTTP Request | Remote: {} | Format: {} | Url: {}'.format(request.remote, format, 'url' in query))
+    logging.info('New HTTP Request | Remote: {} | Format: {} | Url: {}'.format(client, format, 'url' in query))
 
     if 'url' in query:
         url = query['url']
         detailed = 'detailed' in query and query['detailed'] == 'true'
-        if not checkUrl(url):  # Return empty data/page if URL is invalid
+        source = fetchers.parseUrl(url)
+        if source is None:  # Return empty data/page if URL is invalid
             logging.info('Invalid URL: {}'.format(url))
-            if format == 'json':
-                logging.info('Returning empty JSON response.')
-                return web.json_response({})
-            else:
-                logging.info('Returning default HTML response.')
-                return web.Response(text=genEmptyHtmlResponse(), content_type='text/html')
-        if format == 'json':
-            logging.info('Returning JSON response for url: {}'.format(url))
-            response = genJsonResponse(url, detailed)
-            return web.json_response(response)
-        else:
-            logging.info('Returning HTML response for url: {}'.format(url))
-            return web.Response(text=genFullHtmlResponse(url), content_type='text/html')
+            return sendEmpty(request, format)
+        # bots use the JSON API, people the page; people go first
+        lane = 'bulk' if format == 'json' else 'interactive'
+        try:
+            entry, status = await resultCache.getAsync(source.key, lambda: analyzeUrl(source, lane, client))
+        except Overloaded as e:
+            logging.warning('Rejecting {}: {}'.format(url, e))
+            return sendBusy(e, lane)
+        except (aiohttp.ClientError, asyncio.TimeoutError, fetchers.BodyTooLarge, fetchers.LogUnavailable) as e:
+            logging.warning('Fetching {} failed: {!r}'.format(url, e))
+            entry, status = CacheEntry([analyze.NO_LOG], 0), 'error'
+        cacheRequests.inc(status=status)
+        logging.info('Result cache {} | {}'.format(status, resultCache.stats()))
+        return sendResults(request, entry, status, format, detailed, url)
     else:
-        if format == 'json':
-            logging.info('Returning empty JSON response.')
-            return web.json_response({})
+        return sendEmpty(request, format)
+
+
+async def upload_handler(request):
+    """Analyzes a log sent as the request body instead of a paste URL.
+
+    The body is read into a LogBuffer as it arrives, so the log is split
+    into lines while it is being uploaded. Results of uploads are not kept
+    in the result cache; with --store, identical logs are still analyzed
+    only once."""
+    query = request.query
+    format = query.get('format', 'html').lower()
+    detailed = query.get('detailed') == 'true'
+    client = clientOf(request)
+    logging.info('New HTTP Upload | Remote: {} | Format: {} | Size: {}'.format(client, format, request.content_length))
+    lane = 'bulk' if format == 'json' else 'interactive'
+    try:
+        scheduler.check()
+        with phaseSeconds.time(phase='upload'):
+            log = await fetchers.receiveLog(request)
+        msgs = await analyzeUploaded(log, lane, client)
+    except Overloaded as e:
+        logging.warning('Rejecting upload: {}'.format(e))
+        return sendBusy(e, lane)
+    except fetchers.BodyTooLarge as e:
+        logging.warning('Upload too large: {}'.format(e))
+        return web.Response(status=413, text=str(e))
+    except web.RequestPayloadError as e:
+        logging.warning('Reading upload failed: {!r}'.format(e))
+        return web.Response(status=400, text='The request body could not be decoded.')
+    return sendResults(request, CacheEntry(msgs, 0), 'upload', format, detailed, '')
+
+
+async def analyzeBatchItem(item, client, detailed):
+    """Analyzes one item of a batch, a paste URL or {"url": ...} or {"log": text}.
+
+    Returns its record for the NDJSON response: the results as the JSON API
+    has them or the error, and the time it took."""
+    start = time.perf_counter()
+    if isinstance(item, str):
+        item = {"url": item}
+    record = {}
+    try:
+        if isinstance(item, dict) and isinstance(item.get("url"), str):
+            url = record["url"] = item["url"]
+            source = fetchers.parseUrl(url)
+            if source is None:
+                raise ValueError('not a supported paste URL')
+            entry, status = await resultCache.getAsync(source.key, lambda: analyzeUrl(source, 'bulk', client))
+            cacheRequests.inc(status=status)
+            msgs = entry.msgs
+        elif isinstance(item, dict) and isinstance(item.get("log"), str):
+            status = 'upload'
+            msgs = await analyzeUploaded(fetchers.readLogText(item["log"]), 'bulk', client)
         else:
-            logging.info('Returning default HTML response.')
-            return web.Response(text=genEmptyHtmlResponse(), content_type='text/html')
+            raise ValueError('item must be a URL or an object with "url" or "log"')
+        record["cache"] = status
+        record["result"] = genJsonResponse(msgs, detailed)
+    except Overloaded as e:
+        rejectedRequests.inc(lane='bulk')
+        record["error"] = str(e)
+        record["retryAfter"] = e.retryAfter
+    except ValueError as e:
+        record["error"] = str(e)
+    except (aiohttp.ClientError, asyncio.TimeoutError, fetchers.BodyTooLarge, fetchers.LogUnavailable) as e:
+        logging.warning('Fetching {} failed: {!r}'.format(record["url"], e))
+        record["error"] = 'fetching the log failed: {}'.format(type(e).__name__)
+    except Exception:
+        # one broken log must not end the response for all others
+        logging.exception('Analyzing batch item failed')
+        record["error"] = 'internal error'
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
 
 
-async def request_handler(request):
-    """Async request handler. Submits the incoming request to the thread pool to be handled."""
-    return (await loop.run_in_executor(None, sync_request_handler, request))  # Submits the request to a handler inside the threadpool
+async def batch_handler(request):
+    """Analyzes a JSON array of batch items, streaming one JSON record per line as each one finishes.
+
+    Records come in completion order and carry the index of their item.
+    Up to BATCH_CONCURRENCY items are in flight at once; their analyses
+    queue in the bulk lane of the scheduler like any JSON request."""
+    detailed = request.query.get('detailed') == 'true'
+    try:
+        items = json.loads(await fetchers.readBody(request))
+    except fetchers.BodyTooLarge as e:
+        return web.Response(status=413, text=str(e))
+    except (ValueError, web.RequestPayloadError):
+        items = None
+    if not isinstance(items, list):
+        return web.Response(status=400, text='Expected a JSON array of paste URLs, {"url": ...} or {"log": ...} objects.')
+    if len(items) > BATCH_MAX_ITEMS:
+        return web.Response(status=413, text='At most {} logs per batch.'.format(BATCH_MAX_ITEMS))
+    client = clientOf(request)
+    logging.info('New HTTP Batch | Remote: {} | Items: {}'.format(client, len(items)))
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index, item):
+        async with semaphore:
+            record = await analyzeBatchItem(item, client, detailed)
+        return dict(index=index, **record)
+
+    response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-store'})
+    await response.prepare(request)
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            await response.write(json.dumps(await task).encode() + b'\n')
+        await response.write_eof()
+    except ConnectionResetError:
+        logging.info('Batch client {} went away'.format(client))
+    finally:
+        # drops what has not started yet if the client went away
+        for task in tasks:
+            task.cancel()
+    return response
+
+
+async def metrics_handler(request):
+    """Prometheus scrape endpoint."""
+    return web.Response(body=metrics.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Records latency and response size of every request."""
+    start = time.perf_counter()
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else 'unmatched'
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        if getattr(response, 'body', None) is not None:
+            responseBytes.observe(len(response.body), route=route)
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        requestSeconds.observe(time.perf_counter() - start, route=route, status=status)
 
 
 def main():
@@ -182,11 +438,50 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", default="localhost", type=str, help="address to bind to", dest='host')
     parser.add_argument("--port", default="8080", type=int, help="port to bind to", dest='port')
+    parser.add_argument("--cache-size", default=256, type=int, help="number of analysis results to keep in memory", dest='cache_size')
+    parser.add_argument("--cache-ttl", default=600, type=int, help="seconds an analysis result stays cached", dest='cache_ttl')
+    parser.add_argument("--store", default=None, type=str, help="directory for the on-disk log and result store (disabled if not set)", dest='store')
+    parser.add_argument("--store-size", default=1024, type=int, help="size cap of the on-disk store in MiB", dest='store_size')
+    parser.add_argument("--connect-timeout", default=5, type=float, help="seconds to wait for a paste host connection", dest='connect_timeout')
+    parser.add_argument("--read-timeout", default=20, type=float, help="seconds to wait for data from a paste host", dest='read_timeout')
+    parser.add_argument("--max-log-size", default=32, type=int, help="largest log to download or accept as an upload in MiB", dest='max_log_size')
+    parser.add_argument("--host-connections", default=20, type=int, help="concurrent connections per paste host", dest='host_connections')
+    parser.add_argument("--max-queue", default=64, type=int, help="analyses that may wait for a slot before requests are rejected with 503", dest='max_queue')
+    parser.add_argument("--workers", default=0, type=int, help="number of processes to analyze logs on (0 analyzes on the thread pool)", dest='workers')
+    parser.add_argument("--worker-jobs", default=500, type=int, help="analyses per worker process before the processes are replaced (0 never replaces them)", dest='worker_jobs')
+    parser.add_argument("--trusted-proxy", action='append', default=[], help="address of a reverse proxy whose forwarded-for header names the client, may be repeated", dest='trusted_proxies')
+    parser.add_argument("--forwarded-header", default="X-Forwarded-For", type=str, help="header a trusted proxy puts the client address in", dest='forwarded_header')
     flags = parser.parse_args()
 
+    global logStore, workerPool, threadPool, trustedProxies, forwardedHeader
+    resultCache.maxEntries = flags.cache_size
+    resultCache.ttl = flags.cache_ttl
+    if flags.store is not None:
+        logStore = LogStore(flags.store, flags.store_size * 1024 * 1024)
+    fetchers.CONNECT_TIMEOUT = flags.connect_timeout
+    fetchers.READ_TIMEOUT = flags.read_timeout
+    fetchers.MAX_BODY_BYTES = flags.max_log_size * 1024 * 1024
+    fetchers.MAX_CONNECTIONS_PER_HOST = flags.host_connections
+    scheduler.maxQueue = flags.max_queue
+    trustedProxies = frozenset(flags.trusted_proxies)
+    forwardedHeader = flags.forwarded_header
+    if flags.workers > 0:
+        workerPool = WorkerPool(flags.workers, flags.worker_jobs)
+        scheduler.slots = flags.workers
+        # a thread of the pool waits for every analysis running or queued
+        # on the workers
+        threadPool = futures.ThreadPoolExecutor(2 * flags.workers + 4, thread_name_prefix='loganalyzer: worker thread')
+
     loop.set_default_executor(threadPool)  # Set the default executor to our thread pool
-    app.add_routes([web.get('/', request_handler)])
+    app.middlewares.append(metrics_middleware)
+    app.add_routes([web.get('/', request_handler), web.post('/', upload_handler), web.post('/batch', batch_handler), web.get('/metrics', metrics_handler)])
     applicationTask = loop.create_task(web._run_app(app, host=flags.host, port=flags.port, print=logging.info))
+    # shut down cleanly on SIGTERM too, worker processes would outlive us
+    try:
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    except NotImplementedError:
+        # the event loops on Windows have no signal handlers
+        pass
     try:
         loop.run_forever()
     except KeyboardInterrupt:
@@ -194,7 +489,10 @@ def main():
     finally:
         logging.info('Exiting application.')
         applicationTask.cancel()  # Shuts down the HTTP server
+        loop.run_until_complete(fetchers.closeSession())  # Closes pooled upstream connections
         threadPool.shutdown()  # Shuts down the running thread pool
+        if workerPool is not None:
+            workerPool.shutdown()
 
 
 if __name__ == '__main__':
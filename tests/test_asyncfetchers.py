@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from checks.core import AUTOCONFIG_MARKER
+from checks.utils import asyncfetchers
+from checks.utils.fetchers import parseUrl
+
+
+class Content:
+    """Stands in for the aiohttp StreamReader of a response body."""
+
+    def __init__(self, *chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+class ReadLogTest(unittest.IsolatedAsyncioTestCase):
+
+    async def testSplitsAcrossChunks(self):
+        logLines, partial, done = await asyncfetchers.readLog(Content(b'first\nsec', b'ond\n', b'third'), 'utf-8', 'test')
+        self.assertEqual(list(logLines), ['first', 'second', 'third'])
+        self.assertFalse(partial)
+        self.assertTrue(done)
+
+    async def testStopsAtMarker(self):
+        content = Content(b'first\n', AUTOCONFIG_MARKER.encode() + b'\n', b'rest\n')
+        logLines, partial, done = await asyncfetchers.readLog(content, 'utf-8', 'test')
+        self.assertEqual(list(logLines), ['first', AUTOCONFIG_MARKER])
+        self.assertTrue(partial)
+        self.assertFalse(done)
+        self.assertEqual(content.read, 2)
+
+
+class FetchLogTest(unittest.IsolatedAsyncioTestCase):
+
+    source = parseUrl('https://obsproject.com/logs/0123456789abcdef')
+
+    async def fetch(self, *chunks):
+        logLines, partial, _ = await asyncfetchers.readLog(Content(*chunks), 'utf-8', 'test')
+
+        async def fetchSource(source):
+            return None, logLines, partial
+        with mock.patch.object(asyncfetchers, 'fetchSource', fetchSource):
+            return await asyncfetchers.fetchLog(self.source)
+
+    async def testEmptyBodyIsNoLog(self):
+        self.assertIsNone(await self.fetch())
+        self.assertIsNone(await self.fetch(b''))
+
+    async def testDescriptionIsFirstLine(self):
+        description, logLines, partial = await self.fetch(b'first\nsecond\n')
+        self.assertEqual(description, [0, 'DESCRIPTION', 'first'])
+        self.assertEqual(len(logLines), 3)
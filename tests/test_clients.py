@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+
+from aiohttp.test_utils import make_mocked_request
+
+import simplehttp
+
+
+def request(remote, *forwarded):
+    transport = mock.Mock()
+    transport.get_extra_info.return_value = (remote, 40000)
+    headers = [('X-Forwarded-For', value) for value in forwarded]
+    return make_mocked_request('GET', '/', headers=headers, transport=transport)
+
+
+class ClientOfTest(unittest.TestCase):
+
+    def testWithoutProxy(self):
+        # a forwarded-for header of anyone else is not believed
+        self.assertEqual(simplehttp.clientOf(request('203.0.113.5', '198.51.100.1')), '203.0.113.5')
+
+    def testBehindProxy(self):
+        with mock.patch.object(simplehttp, 'trustedProxies', frozenset(['10.0.0.1', '10.0.0.2'])):
+            self.assertEqual(simplehttp.clientOf(request('10.0.0.1', '198.51.100.1')), '198.51.100.1')
+            # the client may send a header of its own, only the addresses
+            # the proxies added count
+            self.assertEqual(simplehttp.clientOf(request('10.0.0.1', '192.0.2.9, 198.51.100.1, 10.0.0.2')), '198.51.100.1')
+            self.assertEqual(simplehttp.clientOf(request('10.0.0.1', '192.0.2.9', '198.51.100.1')), '198.51.100.1')
+            self.assertEqual(simplehttp.clientOf(request('10.0.0.1')), '10.0.0.1')
+            self.assertEqual(simplehttp.clientOf(request('203.0.113.5', '198.51.100.1')), '203.0.113.5')
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import loganalyzer
+from checks.core import AUTOCONFIG_MARKER
+from checks.utils.fetchers import LineSplitter, iterLines, openLocal, readLogStream, readLogText
+
+
+class Response:
+    """Stands in for a streamed requests response."""
+
+    encoding = 'utf-8'
+    url = 'test'
+
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    def iter_content(self, size):
+        return iter(self.chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class LineSplitterTest(unittest.TestCase):
+
+    def testLikeSplit(self):
+        text = 'a\nbc\n\nd\nef'
+        for size in range(1, len(text) + 1):
+            splitter = LineSplitter()
+            lines = []
+            for pos in range(0, len(text), size):
+                lines += splitter.feed(text[pos:pos + size])
+            lines.append(splitter.close())
+            self.assertEqual(lines, text.split('\n'))
+
+    def testCutsLongLines(self):
+        splitter = LineSplitter(maxLength=3)
+        self.assertEqual(splitter.feed('abcdef\nxy') + splitter.feed('z1\n'), ['abc', 'xyz'])
+
+
+class FetchLogTest(unittest.TestCase):
+
+    def fetch(self, *chunks):
+        logLines, partial = readLogStream(iterLines(Response(*chunks)))
+        with mock.patch.object(loganalyzer, 'fetchSource', return_value=(None, logLines, partial)):
+            return loganalyzer.fetchLog(url='https://obsproject.com/logs/0123456789abcdef')
+
+    def testEmptyBodyIsNoLog(self):
+        self.assertIsNone(self.fetch())
+        self.assertIsNone(self.fetch(b''))
+
+    def testDescriptionIsFirstLine(self):
+        description, logLines, partial = self.fetch(b'first\nsec', b'ond\n')
+        self.assertEqual(description, [0, 'DESCRIPTION', 'first'])
+        self.assertEqual(list(logLines), ['first', 'second', ''])
+        self.assertFalse(partial)
+
+
+class ReadLogTextTest(unittest.TestCase):
+
+    def testEmptyIsNoLog(self):
+        self.assertIsNone(readLogText(''))
+
+    def testPartialAtStopMarker(self):
+        description, logLines, partial = readLogText('first\n' + AUTOCONFIG_MARKER + '\nrest')
+        self.assertEqual(description, [0, 'DESCRIPTION', 'first'])
+        self.assertTrue(partial)
+        self.assertFalse(readLogText('first\nsecond')[2])
+
+
+class OpenLocalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def testLog(self):
+        filename = os.path.join(self.dir.name, 'log.txt')
+        with open(filename, 'wb') as f:
+            f.write(b'first\nsecond\n')
+        log = openLocal(filename)
+        try:
+            self.assertEqual(list(log), ['first\n', 'second\n'])
+        finally:
+            log.close()
+
+    def testEmptyFileIsNoLog(self):
+        filename = os.path.join(self.dir.name, 'log.txt')
+        open(filename, 'wb').close()
+        self.assertIsNone(openLocal(filename))
+
+    def testMissingFileRaises(self):
+        with self.assertRaises(FileNotFoundError):
+            openLocal(os.path.join(self.dir.name, 'missing.txt'))
+
+    def testDirectoryRaises(self):
+        with self.assertRaises(IsADirectoryError):
+            openLocal(self.dir.name)
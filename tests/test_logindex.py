@@ -0,0 +1,141 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from checks.utils import logindex
+from checks.utils.logindex import LogBuffer, LogIndex, MappedLogIndex, SharedLogBuffer
+
+# every needle of up to three letters, most of them also found across the
+# end of one line and the start of the next
+NEEDLES = [''.join(p) for n in (1, 2, 3) for p in itertools.product('abc', repeat=n)]
+
+
+def randomLines(seed, count=40):
+    rnd = random.Random(seed)
+    return [''.join(rnd.choice('abc') for _ in range(rnd.randint(0, 4))) for _ in range(count)]
+
+
+class LookupTest:
+    """Lookups of an index against a plain scan of its lines."""
+
+    def build(self, lines):
+        raise NotImplementedError
+
+    def expected(self, lines):
+        """The lines as the index returns them."""
+        return lines
+
+    def check(self, lines, index=None, expected=None):
+        """Compares an index built from lines, or the given one over the same lines."""
+        if expected is None:
+            expected = self.expected(lines)
+        if index is None:
+            index = self.build(lines)
+        try:
+            self.assertEqual(list(index), expected)
+            self.assertEqual(len(index), len(expected))
+            for needle in NEEDLES:
+                hits = [i for i, line in enumerate(expected) if needle in line]
+                # first and exists before and after positions() memoized the needle
+                for _ in range(2):
+                    self.assertEqual(index.first(needle), expected[hits[0]] if hits else None, needle)
+                    self.assertEqual(index.exists(needle), bool(hits), needle)
+                    self.assertEqual(index.positions(needle), hits, needle)
+                    self.assertEqual(index.all(needle), [expected[i] for i in hits], needle)
+                    self.assertEqual(index.count(needle), len(hits), needle)
+        finally:
+            index.close()
+
+    def testLookups(self):
+        for seed in range(20):
+            self.check(randomLines(seed))
+
+    def testAcrossLines(self):
+        self.check(['ab', 'cab', 'c', '', 'a'])
+
+    def testEmptyLines(self):
+        self.check(['', ''])
+
+
+class LogIndexTest(LookupTest, unittest.TestCase):
+
+    def build(self, lines):
+        return LogIndex([line + '\n' for line in lines])
+
+    def expected(self, lines):
+        return [line + '\n' for line in lines]
+
+    def testWithoutNewlines(self):
+        # lines are concatenated without a separator, a match across two
+        # of them is not a hit
+        lines = ['ab', 'cab', 'c']
+        self.check(lines, LogIndex(list(lines)), lines)
+
+    def testExtend(self):
+        for seed in range(10):
+            lines = self.expected(randomLines(seed))
+            index = LogIndex(lines[:5])
+            index.positions('a')
+            for pos in range(5, len(lines), 7):
+                index.extend(lines[pos:pos + 7])
+            self.check(randomLines(seed), index)
+
+
+class LogBufferTest(LookupTest, unittest.TestCase):
+
+    def build(self, lines):
+        return LogBuffer('\n'.join(lines))
+
+    def testExtend(self):
+        for seed in range(10):
+            lines = randomLines(seed)
+            index = LogBuffer()
+            index.extend(lines[:5])
+            index.positions('a')
+            for pos in range(5, len(lines), 7):
+                index.extend(lines[pos:pos + 7])
+            self.check(lines, index)
+
+
+class MappedLogIndexTest(LookupTest, unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, data):
+        filename = os.path.join(self.dir.name, 'log.txt')
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def build(self, lines):
+        return MappedLogIndex(self.write('\r\n'.join(lines).encode() + b'\n'))
+
+    def expected(self, lines):
+        return [line + '\n' for line in lines]
+
+    def testLinesWithoutPread(self):
+        filename = self.write(b'first\r\nsecond\nthird')
+        for pread in (os.pread, None):
+            with mock.patch.object(logindex, 'PREAD', pread):
+                log = MappedLogIndex(filename)
+                try:
+                    self.assertEqual(list(log), ['first\n', 'second\n', 'third'])
+                finally:
+                    log.close()
+
+
+class SharedLogBufferTest(LookupTest, unittest.TestCase):
+
+    def build(self, lines):
+        filename = SharedLogBuffer.write('\n'.join(lines))
+        self.addCleanup(os.unlink, filename)
+        return SharedLogBuffer(filename)
+
+    def testLinesWithoutPread(self):
+        with mock.patch.object(logindex, 'PREAD', None):
+            self.check(['first', 'second', ''])
@@ -0,0 +1,31 @@
+import unittest
+
+from checks.utils.logindex import LogIndex
+from checks.utils.profiler import Profiler, profiling
+from checks.utils.utils import exists, first, search
+
+
+class ProfiledScanTest(unittest.TestCase):
+
+    def lines(self, profiler, name):
+        return profiler.stats[name][3]
+
+    def testCountsLinesSearched(self):
+        log = LogIndex(['a\n', 'b\n', 'c\n', 'd\n'])
+        profiler = Profiler()
+        with profiling(profiler):
+            first('b', log)
+            exists('x', log)
+            search('c', log)
+            # answered from the memo
+            search('c', log)
+            exists('c', log)
+        self.assertEqual(self.lines(profiler, 'first'), 2)
+        self.assertEqual(self.lines(profiler, 'exists'), 4)
+        self.assertEqual(self.lines(profiler, 'search'), 4)
+
+    def testPlainListIsScannedWhole(self):
+        profiler = Profiler()
+        with profiling(profiler):
+            search('c', ['a', 'b', 'c'])
+        self.assertEqual(self.lines(profiler, 'search'), 3)
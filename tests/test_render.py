@@ -0,0 +1,28 @@
+import unittest
+
+from server.render import PageRenderer, Template
+
+
+class TemplateTest(unittest.TestCase):
+
+    def render(self, text, values):
+        out = []
+        Template(text).write(out, values)
+        return ''.join(out)
+
+    def testLikeFormat(self):
+        for text in ['', '{x}', 'a {x} b {x}', '{{', 'a{{b}} {x} c', '{x}}}{{{x}']:
+            self.assertEqual(self.render(text, {'x': 'X'}), text.format(x='X'))
+
+    def testListValue(self):
+        self.assertEqual(self.render('<{x}>', {'x': ['a', 'b']}), '<ab>')
+
+
+class PageRendererTest(unittest.TestCase):
+
+    def testTitlesAreNotEscapedTwice(self):
+        renderer = PageRenderer('{ph}|{description}|{summary_critical}|{summary_warning}|{summary_info}|{details}',
+                                '{anchor} {sev} {severity} {title} {text}')
+        page = renderer.page('u', [[0, 'DESCRIPTION', 'd'], [1, 'Custom OBS Build (1&lt;2)', 'text']]).decode()
+        self.assertIn('Custom OBS Build (1&lt;2)', page)
+        self.assertNotIn('&amp;', page)
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+from server.scheduler import Overloaded, Scheduler
+
+
+class SchedulerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def testCancelQueuedJob(self):
+        scheduler = Scheduler(1, 4)
+        release = asyncio.Event()
+        ran = []
+
+        async def long():
+            await release.wait()
+            ran.append('long')
+
+        async def job(name):
+            ran.append(name)
+
+        first = asyncio.ensure_future(scheduler.run('bulk', 'a', long))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(scheduler.run('bulk', 'b', lambda: job('cancelled')))
+        await asyncio.sleep(0)
+        self.assertEqual((scheduler.running, scheduler.queued), (1, 1))
+        queued.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+        self.assertEqual((scheduler.running, scheduler.queued), (1, 0))
+
+        release.set()
+        await first
+        self.assertEqual((scheduler.running, scheduler.queued), (0, 0))
+        await scheduler.run('bulk', 'c', lambda: job('next'))
+        self.assertEqual(ran, ['long', 'next'])
+
+    async def testCancelledWaiterIsSkippedOnRelease(self):
+        # cancelled after the release picked it, before its task woke up
+        scheduler = Scheduler(1, 4)
+        release = asyncio.Event()
+        ran = []
+
+        async def long():
+            await release.wait()
+
+        async def job(name):
+            ran.append(name)
+
+        first = asyncio.ensure_future(scheduler.run('bulk', 'a', long))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(scheduler.run('bulk', 'b', lambda: job('cancelled')))
+        other = asyncio.ensure_future(scheduler.run('bulk', 'c', lambda: job('other')))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        await first
+        await other
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+        self.assertEqual(ran, ['other'])
+        self.assertEqual((scheduler.running, scheduler.queued), (0, 0))
+
+    async def testPriorityAndRejection(self):
+        scheduler = Scheduler(1, 2)
+        release = asyncio.Event()
+        ran = []
+
+        async def long():
+            await release.wait()
+
+        async def job(name):
+            ran.append(name)
+
+        first = asyncio.ensure_future(scheduler.run('bulk', 'a', long))
+        await asyncio.sleep(0)
+        bulk = asyncio.ensure_future(scheduler.run('bulk', 'a', lambda: job('bulk')))
+        interactive = asyncio.ensure_future(scheduler.run('interactive', 'b', lambda: job('interactive')))
+        await asyncio.sleep(0)
+        with self.assertRaises(Overloaded):
+            await scheduler.run('bulk', 'c', lambda: job('rejected'))
+        release.set()
+        await asyncio.gather(first, bulk, interactive)
+        self.assertEqual(ran, ['interactive', 'bulk'])
+
+
+if __name__ == '__main__':
+    unittest.main()
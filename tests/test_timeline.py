@@ -0,0 +1,46 @@
+import unittest
+
+from checks.timeline import Timeline
+from checks.utils.logindex import LogBuffer
+
+DROPS = "{}: Output 'simple_stream': Number of dropped frames due to insufficient bandwidth/connection stalls: 9 ({})"
+BUFFERING = "{}: adding 20 milliseconds of audio buffering, total audio buffering is now {} milliseconds"
+
+
+def timeline(*lines):
+    return Timeline(LogBuffer('\n'.join(lines)))
+
+
+class TimelineTest(unittest.TestCase):
+
+    def testPercentages(self):
+        drops = timeline('23:59:30.000: OBS 26.1.0',
+                         DROPS.format('23:59:40.000', '1.5%'),
+                         'no timestamp',
+                         DROPS.format('00:01:00.500', '4,0%'))['droppedFrames']
+        self.assertEqual(list(drops.values), [1.5, 4.0])
+        self.assertEqual(list(drops.lines), [1, 3])
+        # past midnight
+        self.assertEqual(list(drops.times), [10.0, 90.5])
+
+    def testBetween(self):
+        # drops concentrated in the first minute
+        lines = [DROPS.format('10:00:{:02}.000'.format(s), '{}%'.format(s)) for s in (0, 20, 40, 59)]
+        lines.append(DROPS.format('10:05:00.000', '1%'))
+        drops = timeline(*lines)['droppedFrames']
+        self.assertEqual(list(drops.between(0, 60)), [0, 20, 40, 59])
+        self.assertEqual(list(drops.between(60, 600)), [1])
+
+    def testMaxRise(self):
+        buffering = timeline(BUFFERING.format('10:00:00.000', 100),
+                             BUFFERING.format('10:00:05.000', 300),
+                             BUFFERING.format('10:00:20.000', 500),
+                             BUFFERING.format('10:00:25.000', 900))['audioBuffering']
+        self.assertEqual(buffering.maximum(), 900)
+        self.assertEqual(buffering.maxRise(10), (400, 25.0))
+
+    def testSeriesWithoutEvents(self):
+        series = timeline('10:00:00.000: OBS 26.1.0')['encoderLag']
+        self.assertEqual(len(series), 0)
+        self.assertEqual(series.maximum(), 0)
+        self.assertEqual(series.maxRise(10), (0, None))
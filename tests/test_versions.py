@@ -0,0 +1,32 @@
+import unittest
+
+from checks.utils.versions import parseVersion
+
+
+# in increasing order, like pkg_resources.parse_version sorts them
+ORDERED = ['26.0.0-caffeine', '26.1.0-modified',
+           '1.0.dev0', '1.0a1', '1.0b1', '1.0rc1', '1.0', '1.0+abc', '1.0+abc.1', '1.0+abc.2', '1.0+5',
+           '1.0.post1.dev0', '1.0.post1', '1.0.1',
+           '24.0.3', '27.0.0-beta1', '27.0.0-rc1', '27.0.0-rc2', '27.0.0', '27.0.1',
+           '1!0.1']
+
+
+class ParseVersionTest(unittest.TestCase):
+
+    def testOrder(self):
+        keys = [parseVersion(v) for v in ORDERED]
+        for i in range(len(keys) - 1):
+            self.assertLess(keys[i], keys[i + 1], '{} < {}'.format(ORDERED[i], ORDERED[i + 1]))
+
+    def testEqual(self):
+        for a, b in [('21.1.0', '21.1'), ('21.1', '21.1.0.0'), ('1.0-1', '1.0.post1'),
+                     ('1.0RC1', '1.0rc1'), ('1.0-beta.2', '1.0b2'), ('v1.0', '1.0'), (' 1.0 ', '1.0')]:
+            self.assertEqual(parseVersion(a), parseVersion(b), '{} == {}'.format(a, b))
+
+    def testNotPep440(self):
+        # LegacyVersions: before every real version, equal to none
+        modified = parseVersion('26.1.0-modified')
+        self.assertNotEqual(modified, parseVersion('26.1.0'))
+        self.assertLess(modified, parseVersion('0.0.1'))
+        self.assertLessEqual(modified, parseVersion('24.0.3'))
+        self.assertEqual(modified, parseVersion('26.1.0-modified'))
@@ -0,0 +1,46 @@
+import os
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+
+from server.workers import WorkerPool
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def testRecoversFromDeadWorker(self):
+        pool = WorkerPool(1)
+        try:
+            self.assertEqual(pool.run(abs, -1), 1)
+            with self.assertRaises(BrokenProcessPool):
+                pool.run(os._exit, 1)
+            self.assertEqual(pool.run(abs, -2), 2)
+            self.assertEqual(pool.restarted, 1)
+        finally:
+            pool.shutdown()
+
+    def testRecycles(self):
+        pool = WorkerPool(1, maxJobs=2)
+        try:
+            pids = [pool.run(os.getpid) for _ in range(4)]
+            self.assertEqual(len(set(pids)), 2)
+            self.assertEqual(pool.recycled, 1)
+            # the worker of the old pool exits
+            deadline = time.monotonic() + 10
+            while alive(pids[0]) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertFalse(alive(pids[0]))
+        finally:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()